@@ -1,9 +1,7 @@
-import google.generativeai as genai
 from google.adk.agents import Agent
 
 from state.story_state import StoryState
-from utils.config import load_config
-from utils.env import load_env
+from utils.llm import GeminiModel
 from utils.logger import get_logger
 from typing import ClassVar
 from pydantic import PrivateAttr
@@ -11,9 +9,6 @@ from pydantic import PrivateAttr
 import json
 
 # --- Configuration & Logging ---
-load_env()
-config = load_config()
-genai.configure(api_key=config["api_keys"]["google_api_key"])
 logger = get_logger(__name__)
 
 # -- System Prompts ----
@@ -41,15 +36,15 @@ class IdeaExpansionAgent(Agent):
     """
 
     MAX_DURATION_SEC: ClassVar[int] = 30
-    _llm: genai.GenerativeModel = PrivateAttr()
+    _llm: GeminiModel = PrivateAttr()
 
     name: str = "idea_expansion_agent"
     description: str = "Expands a simple idea into a full cinematic concept."
 
     def __init__(self):
         super().__init__()
-        self._llm = genai.GenerativeModel(
-            model_name=config["models"]["idea_expansion"],
+        self._llm = GeminiModel(
+            model_key="idea_expansion",
             system_instruction=SYSTEM_PROMPT,
             generation_config={"response_mime_type": "application/json"},
         )
@@ -76,7 +71,9 @@ class IdeaExpansionAgent(Agent):
             This is a strict creative constraint for a very short video.
             """
 
-            response = self._llm.generate_content(user_prompt)
+            response = self._llm.generate_content(
+                user_prompt, metadata=story_state.metadata
+            )
 
             # Store the output in the state
             expanded_idea_json = response.text
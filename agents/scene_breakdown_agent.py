@@ -1,19 +1,16 @@
-import google.generativeai as genai
 import json
 from google.adk.agents import Agent
 
 from state.story_state import StoryState
-from utils.config import load_config
-from utils.env import load_env
+from utils.json_stream import JsonArrayStreamParser
+from utils.llm import GeminiModel
 from utils.logger import get_logger
+from utils.prompt_payload import lean_payload
 
-from typing import ClassVar
+from typing import Callable, ClassVar, Optional
 from pydantic import PrivateAttr
 
 # --- Configuration & Logging ---
-load_env()
-config = load_config()
-genai.configure(api_key=config["api_keys"]["google_api_key"])
 logger = get_logger(__name__)
 
 # --- System Prompts ---
@@ -36,6 +33,12 @@ Each object in the "scenes" list MUST have these exact keys:
 - "key_action": The single most important action happening in this shot.
 """
 
+# Shots are purely visual, so dialogue and voiceover are not sent
+SCRIPT_FIELDS = {
+    "title": None,
+    "scenes": {"scene_number": None, "location": None, "action": None},
+}
+
 
 # --- Agent Definition ---
 class SceneBreakdownAgent(Agent):
@@ -46,19 +49,27 @@ class SceneBreakdownAgent(Agent):
     MAX_SCENES: ClassVar[int] = 10
     name: str = "scene_breakdown_agent"
     description: str = "Breaks a script down into a visual shot list."
-    _llm: genai.GenerativeModel = PrivateAttr()
+    _llm: GeminiModel = PrivateAttr()
 
     def __init__(self):
         super().__init__()
-        self._llm = genai.GenerativeModel(
-            model_name=config["models"]["scene_breakdown"],
+        self._llm = GeminiModel(
+            model_key="scene_breakdown",
             system_instruction=SYSTEM_PROMPT,
             generation_config={"response_mime_type": "application/json"},
         )
 
-    def call(self, story_state: StoryState) -> StoryState:
+    def call(
+        self,
+        story_state: StoryState,
+        on_scene: Optional[Callable[[dict], None]] = None,
+    ) -> StoryState:
         """
         Takes the script and generates a list of visual shots.
+
+        If `on_scene` is given, the response is streamed and `on_scene` is
+        called with each shot as soon as its JSON object is complete, before
+        the rest of the list has been written.
         """
 
       
@@ -70,8 +81,13 @@ class SceneBreakdownAgent(Agent):
         logger.info("Breaking down script into visual shots...")
 
         try:
-            # Prepare the prompt, sending the full script
-            script_json = json.dumps(story_state.script, indent=2)
+            # Prepare the prompt, sending only the script's visual fields
+            script_json = lean_payload(
+                story_state.script,
+                SCRIPT_FIELDS,
+                story_state.metadata,
+                "scene_breakdown_payload_chars",
+            )
             user_prompt = f"""
             Break down the following script into a visual shot list:
 
@@ -84,7 +100,17 @@ class SceneBreakdownAgent(Agent):
             """
 
            
-            response = self._llm.generate_content(user_prompt)
+            on_chunk = None
+            if on_scene is not None:
+                parser = JsonArrayStreamParser("scenes")
+
+                def on_chunk(text: str):
+                    for scene in parser.feed(text):
+                        on_scene(scene)
+
+            response = self._llm.generate_content(
+                user_prompt, metadata=story_state.metadata, on_chunk=on_chunk
+            )
 
             # The response will be {"scenes": [...]}
             # We extract the list and save it.
@@ -1,18 +1,14 @@
-import google.generativeai as genai
 import json
 from google.adk.agents import Agent
 
 from state.story_state import StoryState
-from utils.config import load_config
-from utils.env import load_env
+from utils.llm import GeminiModel
 from utils.logger import get_logger
+from utils.prompt_payload import compact_json
 
 from pydantic import PrivateAttr
 
 # --- Configuration & Logging ---
-load_env()
-config = load_config()
-genai.configure(api_key=config["api_keys"]["google_api_key"])
 logger = get_logger(__name__)
 
 # ---System Prompts ---
@@ -41,7 +37,6 @@ Each "dialogdialogue" object MUST have these keys:
 - "line": The words the character says.
 """
 
-
 # --Agent Definition ----
 class ScriptWriterAgent(Agent):
     """
@@ -51,12 +46,12 @@ class ScriptWriterAgent(Agent):
     name: str = "script_writer_agent"
     description: str = "Writes a short video script from a cinematic concept."
 
-    _llm: genai.GenerativeModel = PrivateAttr()
+    _llm: GeminiModel = PrivateAttr()
 
     def __init__(self):
         super().__init__()
-        self._llm = genai.GenerativeModel(
-            model_name=config["models"]["script_writer"],
+        self._llm = GeminiModel(
+            model_key="script_writer",
             system_instruction=SYSTEM_PROMPT,
             generation_config={"response_mime_type": "application/json"},
         )
@@ -70,8 +65,9 @@ class ScriptWriterAgent(Agent):
         logger.info("Writing script...")
 
         try:
-            # We MUST define concept_json FIRST
-            concept_json = json.dumps(story_state.expanded_idea, indent=2)
+            # We MUST define concept_json FIRST. The script uses every field
+            # of the concept, so it is only compacted, not projected.
+            concept_json = compact_json(story_state.expanded_idea)
 
             # THEN we can USE it to build the user_prompt
             user_prompt = f"""
@@ -80,7 +76,9 @@ class ScriptWriterAgent(Agent):
             {concept_json}
             """
 
-            response = self._llm.generate_content(user_prompt)
+            response = self._llm.generate_content(
+                user_prompt, metadata=story_state.metadata
+            )
 
             script_json = response.text
             story_state.script = json.loads(script_json)
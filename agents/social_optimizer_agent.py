@@ -1,19 +1,14 @@
-import google.generativeai as genai
 import json
 from google.adk.agents import Agent
 
 from state.story_state import StoryState
-from utils.config import load_config
-from utils.env import load_env
+from utils.llm import GeminiModel
 from utils.logger import get_logger
 from tools.hashtag_tool import HashtagTool
 
 from pydantic import PrivateAttr
 
 # --- Configuration & Logging ---
-load_env()
-config = load_config()
-genai.configure(api_key=config["api_keys"]["google_api_key"])
 logger = get_logger(__name__)
 
 # --- System Prompts ---
@@ -40,14 +35,14 @@ class SocialOptimizationAgent(Agent):
 
     name: str = "social_optimizer_agent"
     description: str = "Generates captions, hashtags, and posting tips."
-    _llm: genai.GenerativeModel = PrivateAttr()
+    _llm: GeminiModel = PrivateAttr()
     _hashtag_tool: HashtagTool = PrivateAttr()
 
     def __init__(self):
         super().__init__()
         # Initialize the LLM
-        self._llm = genai.GenerativeModel(
-            model_name=config["models"]["social_optimizer"],
+        self._llm = GeminiModel(
+            model_key="social_optimizer",
             system_instruction=SYSTEM_PROMPT,
             generation_config={"response_mime_type": "application/json"},
         )
@@ -73,7 +68,9 @@ class SocialOptimizationAgent(Agent):
             # 1. Use the HashTagTool to get some base hashtags
             topic = story_state.expanded_idea.get("theme", "general")
 
-            base_hashtags = self._hashtag_tool.call({"topic": topic})["hashtags"]
+            base_hashtags = self._hashtag_tool.call(
+                {"topic": topic}, metadata=story_state.metadata
+            )["hashtags"]
 
             # 2. Prepare the prompt for the LLM
             logline = story_state.script.get("logline", "A short video.")
@@ -88,7 +85,9 @@ class SocialOptimizationAgent(Agent):
             """
 
             # 3. Call the LLM
-            response = self._llm.generate_content(user_prompt)
+            response = self._llm.generate_content(
+                user_prompt, metadata=story_state.metadata
+            )
 
             # 4. Store the output in the state
             social_json = response.text
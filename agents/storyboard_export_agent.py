@@ -0,0 +1,52 @@
+from google.adk.agents import Agent
+from pydantic import PrivateAttr
+
+from state.story_state import StoryState
+from utils.logger import get_logger
+from utils.storyboard_pdf import StoryboardPdfExporter, get_pdf_exporter
+
+# --- Configuration & Logging ---
+logger = get_logger(__name__)
+
+
+# --- Agent Definition ---
+class StoryboardExportAgent(Agent):
+    """
+    Agent 4c: Exports the storyboard as a PDF, one page per shot with its
+    frame, description, camera angle and dialogue.
+    """
+
+    name: str = "storyboard_export_agent"
+    description: str = "Exports the storyboard as a PDF."
+    _exporter: StoryboardPdfExporter = PrivateAttr()
+
+    def __init__(self):
+        super().__init__()
+        self._exporter = get_pdf_exporter()
+
+    def call(self, story_state: StoryState) -> StoryState:
+        """
+        Writes the PDF and records its path in story_state.storyboard_pdf,
+        or {"error": ...} if it could not be written.
+        """
+        if not story_state.scenes:
+            logger.warning("No scenes found. Skipping storyboard export.")
+            story_state.metadata["error_export"] = "Missing scenes"
+            story_state.storyboard_pdf = {"error": "Missing scenes"}
+            return story_state
+
+        logger.info("Exporting storyboard PDF...")
+        try:
+            story_state.storyboard_pdf = self._exporter.export(
+                story_state.run_id,
+                story_state.script,
+                story_state.scenes,
+                story_state.storyboard_prompts,
+                story_state.storyboard_images,
+            )
+        except Exception as e:
+            logger.error(f"Error exporting storyboard PDF: {e}")
+            story_state.metadata["error_export"] = str(e)
+            story_state.storyboard_pdf = {"error": str(e)}
+
+        return story_state
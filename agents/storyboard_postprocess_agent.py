@@ -0,0 +1,129 @@
+import os
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.agents import Agent
+from pydantic import PrivateAttr
+
+from state.story_state import StoryState
+from utils.config import load_config
+from utils.image_variants import make_contact_sheet, make_variants
+from utils.logger import get_logger
+from utils.process_pool import get_process_pool
+
+# --- Configuration & Logging ---
+logger = get_logger(__name__)
+
+
+# --- Agent Definition ---
+class StoryboardPostProcessAgent(Agent):
+    """
+    Agent 4b: Turns the raw storyboard frames into publishable assets.
+
+    For each frame it writes a JPEG thumbnail and a WebP copy, and it tiles
+    all frames into one contact sheet. Resizing and encoding are CPU-bound,
+    so they run on the shared process pool, one task per frame plus one for
+    the sheet, and never hold the GIL in the calling process.
+    """
+
+    name: str = "storyboard_postprocess_agent"
+    description: str = "Creates thumbnails, WebP variants and a contact sheet."
+    _output_dir: str = PrivateAttr()
+    _thumbnail_size: Tuple[int, int] = PrivateAttr()
+    _webp_quality: int = PrivateAttr()
+    _columns: int = PrivateAttr()
+    _cell_width: int = PrivateAttr()
+
+    def __init__(self):
+        super().__init__()
+        config = load_config()
+        postprocess_config = config.get("postprocess", {})
+        self._output_dir = config.paths.get("storyboards", "outputs/storyboards")
+        thumbnail_px = postprocess_config.get("thumbnail_px", 320)
+        self._thumbnail_size = (thumbnail_px, thumbnail_px)
+        self._webp_quality = postprocess_config.get("webp_quality", 80)
+        self._columns = postprocess_config.get("contact_sheet_columns", 4)
+        self._cell_width = postprocess_config.get("contact_sheet_cell_px", 256)
+
+    def call(self, story_state: StoryState) -> StoryState:
+        """
+        Writes the assets to <paths.storyboards>/<run_id>/ and records their
+        paths in story_state.storyboard_assets. If nothing could be written,
+        storyboard_assets is {"error": ...} instead.
+        """
+        frames = self._frames(story_state)
+        if not frames:
+            # Every scene failed upstream; that is not a post-processing error
+            logger.warning("No storyboard images found. Skipping post-processing.")
+            return story_state
+
+        run_dir = os.path.join(self._output_dir, os.path.basename(story_state.run_id))
+        logger.info(f"Post-processing {len(frames)} storyboard images...")
+
+        try:
+            pool = get_process_pool()
+            variant_futures: List[Tuple[str, Future]] = [
+                (
+                    scene_id,
+                    pool.submit(
+                        make_variants,
+                        image_path,
+                        os.path.join(run_dir, "thumbnails", f"scene_{scene_id}.jpeg"),
+                        os.path.join(run_dir, "web", f"scene_{scene_id}.webp"),
+                        self._thumbnail_size,
+                        self._webp_quality,
+                    ),
+                )
+                for scene_id, image_path in frames
+            ]
+            sheet_future = pool.submit(
+                make_contact_sheet,
+                [image_path for _, image_path in frames],
+                os.path.join(run_dir, "contact_sheet.jpeg"),
+                self._columns,
+                self._cell_width,
+            )
+        except Exception as e:
+            logger.error(f"Could not start storyboard post-processing: {e}")
+            story_state.metadata["error_postprocess"] = str(e)
+            story_state.storyboard_assets = {"error": str(e)}
+            return story_state
+
+        # One bad frame does not lose the others
+        scenes: List[Dict[str, Any]] = []
+        for scene_id, future in variant_futures:
+            try:
+                scenes.append({"scene_id": scene_id, **future.result()})
+            except Exception as e:
+                logger.error(f"Error post-processing scene {scene_id}: {e}")
+                scenes.append({"scene_id": scene_id, "error": str(e)})
+
+        contact_sheet: Optional[str] = None
+        try:
+            contact_sheet = sheet_future.result()
+        except Exception as e:
+            logger.error(f"Error building the contact sheet: {e}")
+
+        if contact_sheet is None and all("error" in scene for scene in scenes):
+            story_state.metadata["error_postprocess"] = "Every post-processing task failed"
+            story_state.storyboard_assets = {"error": "Every post-processing task failed"}
+            return story_state
+
+        story_state.storyboard_assets = {"scenes": scenes, "contact_sheet": contact_sheet}
+        logger.info(f"Storyboard assets written to {run_dir}")
+        return story_state
+
+    @staticmethod
+    def _frames(story_state: StoryState) -> List[Tuple[str, str]]:
+        """
+        Returns (scene_id, image_path) for every image that exists on disk.
+        Failed scenes are stored as ERROR_* placeholders, not paths.
+        """
+        prompts = story_state.storyboard_prompts or []
+        frames = []
+        for index, image_path in enumerate(story_state.storyboard_images or []):
+            if not os.path.isfile(image_path):
+                continue
+            scene_id = prompts[index].get("scene_id") if index < len(prompts) else None
+            frames.append((str(scene_id if scene_id is not None else index + 1), image_path))
+        return frames
@@ -1,22 +1,33 @@
-import google.generativeai as genai
 from google.adk.agents import Agent
 from pydantic import PrivateAttr
+import contextvars
 import json
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
 
 from state.story_state import StoryState
-from utils.config import load_config
-from utils.env import load_env
-from utils.logger import get_logger
+from utils.image_scheduler import ImageGenerationScheduler, get_image_scheduler
+from utils.logger import get_logger, log_context
+from utils.profiling import profiled
 from tools.image_generation_tool import ImageGenerationTool
 from tools.prompt_refiner_tool import PromptRefinerTool
 
 # --- Configuration & Logging ---
-load_env()
-config = load_config()
-genai.configure(api_key=config["api_keys"]["google_api_key"])
 logger = get_logger(__name__)
 
+
+def build_scene_text(scene: dict) -> str:
+    """
+    Flattens a shot from the scene breakdown into text for the prompt refiner.
+    """
+    return (
+        f"Shot: {scene.get('camera_angle', '')}. "
+        f"Location: {scene.get('location', '')}. "
+        f"Action: {scene.get('key_action', '')}. "
+        f"Description: {scene.get('shot_description', '')}"
+    )
+
+
 # --- Agent 1: The Worker (Processes one scene) ---
 
 
@@ -39,27 +50,36 @@ class SingleSceneVisualAgent(Agent):
         self._refiner_tool = refiner_tool
         self._image_tool = image_tool
 
-    def call(self, scene: dict) -> dict:
+    def call(
+        self,
+        scene: dict,
+        metadata: Optional[dict] = None,
+        prompt: Optional[str] = None,
+        run_id: Optional[str] = None,
+    ) -> dict:
         """
-        Processes one scene.
+        Processes one scene. LLM cache counters and call latencies are added
+        to `metadata` if given.
+        If `prompt` is given (already refined in a batch), refinement is skipped.
+        The image is recorded in the image store's manifest for `run_id`.
         """
         scene_id = scene.get("scene_id", "unknown")
         logger.info(f"Generating visuals for scene {scene_id}...")
 
         try:
-            scene_text = (
-                f"Shot: {scene.get('camera_angle', '')}. "
-                f"Location: {scene.get('location', '')}. "
-                f"Action: {scene.get('key_action', '')}. "
-                f"Description: {scene.get('shot_description', '')}"
-            )
-
-            refiner_input = {"scene_text": scene_text}
-            refiner_output = self._refiner_tool.call(refiner_input)
-            final_prompt = refiner_output["prompt"]
+            if prompt is not None:
+                final_prompt = prompt
+            else:
+                refiner_input = {"scene_text": build_scene_text(scene)}
+                refiner_output = self._refiner_tool.call(
+                    refiner_input, metadata=metadata
+                )
+                final_prompt = refiner_output["prompt"]
 
             image_input = {"prompt": final_prompt, "scene_id": scene_id}
-            image_output = self._image_tool.call(image_input)
+            if run_id is not None:
+                image_input["run_id"] = run_id
+            image_output = self._image_tool.call(image_input, metadata=metadata)
             image_path = image_output["image_path"]
 
             logger.info(f"Visuals complete for scene {scene_id}.")
@@ -75,6 +95,167 @@ class SingleSceneVisualAgent(Agent):
             return {"scene_id": scene_id, "prompt": "Error", "image_path": "Error"}
 
 
+# --- Storyboard Session (Accepts scenes as they arrive) ---
+class StoryboardSession:
+    """
+    Generates visuals for scenes submitted one at a time, so image work can
+    start before the full scene list exists. finish() waits for every
+    submitted scene and writes the results into the StoryState.
+
+    Scenes run on the process-wide image scheduler under the run's ID, which
+    rate-limits and interleaves them with every other pipeline's scenes.
+
+    Scenes submitted without a prompt are refined in groups of
+    `refine_group_size`, one batched refiner call per group, on a
+    background thread so the caller is never blocked by the LLM.
+    """
+
+    def __init__(
+        self,
+        worker_agent: SingleSceneVisualAgent,
+        story_state: StoryState,
+        on_scene_complete: Optional[Callable[[dict], None]] = None,
+        scheduler: Optional[ImageGenerationScheduler] = None,
+        refiner_tool: Optional[PromptRefinerTool] = None,
+        refine_group_size: int = 4,
+    ):
+        self._worker_agent = worker_agent
+        self._story_state = story_state
+        self._on_scene_complete = on_scene_complete
+        self._scheduler = scheduler or get_image_scheduler()
+        self._refiner_tool = refiner_tool
+        self._refine_group_size = max(1, refine_group_size)
+        self._pending: List[Tuple[dict, Future]] = []
+        self._refine_executor: Optional[ThreadPoolExecutor] = None
+        self._futures = []
+
+    def submit(self, scene: dict, prompt: Optional[str] = None):
+        """
+        Starts generating one scene. Without a `prompt`, the scene waits
+        for its refinement group to fill (or for finish()).
+        """
+        if prompt is None and self._refiner_tool is not None:
+            future: Future = Future()
+            self._pending.append((scene, future))
+            if len(self._pending) >= self._refine_group_size:
+                self._flush()
+        else:
+            future = self._schedule(scene, prompt)
+        if self._on_scene_complete is not None:
+            future.add_done_callback(lambda f: self._on_scene_complete(f.result()))
+        self._futures.append(future)
+
+    def _schedule(self, scene: dict, prompt: Optional[str]) -> Future:
+        return self._scheduler.submit(
+            self._story_state.run_id, self._generate, scene, prompt
+        )
+
+    def _flush(self):
+        # Refines the pending group off the caller's thread, then queues its images
+        if not self._pending:
+            return
+        group, self._pending = self._pending, []
+        if self._refine_executor is None:
+            self._refine_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="prompt-refine"
+            )
+        self._refine_executor.submit(contextvars.copy_context().run, self._refine, group)
+
+    def _refine(self, group: List[Tuple[dict, Future]]):
+        try:
+            with log_context(stage="storyboard"):
+                prompts = self._refiner_tool.call_batch(
+                    [build_scene_text(scene) for scene, _ in group],
+                    metadata=self._story_state.metadata,
+                )
+        except Exception as e:
+            for _, future in group:
+                future.set_exception(e)
+            return
+
+        for (scene, future), prompt in zip(group, prompts):
+            self._schedule(scene, prompt).add_done_callback(
+                lambda f, future=future: _copy_outcome(f, future)
+            )
+
+    def _generate(self, scene: dict, prompt: Optional[str]) -> dict:
+        # Submitted from the scene breakdown stage, so re-tag the stage
+        with log_context(stage="storyboard", scene_id=scene.get("scene_id")), profiled(
+            "storyboard_scene"
+        ):
+            return self._worker_agent.call(
+                scene, self._story_state.metadata, prompt, self._story_state.run_id
+            )
+
+    def finish(self) -> StoryState:
+        """
+        Waits for all submitted scenes and stores prompts and images in
+        submission order.
+        """
+        story_state = self._story_state
+
+        # Scenes that never came through submit() (e.g. the stream could
+        # not be parsed incrementally) are generated now instead
+        if not self._futures and story_state.scenes:
+            for scene in story_state.scenes:
+                self.submit(scene)
+        self._flush()
+
+        if not self._futures:
+            logger.warning("No scenes found. Skipping storyboard generation.")
+            story_state.metadata["error_storyboard"] = "Missing scenes"
+            self.close()
+            return story_state
+
+        try:
+            visual_outputs = [future.result() for future in self._futures]
+
+            story_state.storyboard_prompts = []
+            story_state.storyboard_images = []
+
+            for output in visual_outputs:
+                if output["image_path"] != "Error":
+                    story_state.storyboard_prompts.append(
+                        {"scene_id": output["scene_id"], "prompt": output["prompt"]}
+                    )
+                    story_state.storyboard_images.append(output["image_path"])
+
+            logger.info(
+                f"Parallel visual generation complete. {len(story_state.storyboard_images)} images created."
+            )
+
+        except Exception as e:
+            logger.error(f"Error during parallel storyboard generation: {e}")
+            story_state.metadata["error_storyboard"] = str(e)
+
+        finally:
+            self.close()
+
+        return story_state
+
+    def close(self):
+        """
+        Drops this run's scenes that have not started yet.
+        Safe to call more than once.
+        """
+        for _, future in self._pending:
+            future.cancel()
+        self._pending = []
+        if self._refine_executor is not None:
+            # Scenes of a group still being refined are queued, then dropped below
+            self._refine_executor.shutdown(wait=True)
+        self._scheduler.cancel_job(self._story_state.run_id)
+
+
+def _copy_outcome(source: Future, target: Future):
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
 # --- Agent 2: The Orchestrator (Manages parallel workers) ---
 class StoryboardVisualAgent(Agent):
     """
@@ -84,17 +265,44 @@ class StoryboardVisualAgent(Agent):
     name: str = "storyboard_visual_agent"
     description: str = "Generates storyboard prompts and images in parallel."
 
+    _refiner_tool: PromptRefinerTool = PrivateAttr()
     _worker_agent: SingleSceneVisualAgent = PrivateAttr()
 
     def __init__(self):
         super().__init__()
-        refiner_tool = PromptRefinerTool()
+        self._refiner_tool = PromptRefinerTool()
         image_tool = ImageGenerationTool()
-        self._worker_agent = SingleSceneVisualAgent(refiner_tool, image_tool)
+        self._worker_agent = SingleSceneVisualAgent(self._refiner_tool, image_tool)
 
-    def call(self, story_state: StoryState) -> StoryState:
+    def open_session(
+        self,
+        story_state: StoryState,
+        on_scene_complete: Optional[Callable[[dict], None]] = None,
+        refine_group_size: int = 4,
+    ) -> StoryboardSession:
+        """
+        Starts a session that generates scenes as soon as they are submitted,
+        refining their prompts `refine_group_size` scenes per LLM call.
+        Used to overlap image generation with a still-streaming scene breakdown.
+        """
+        return StoryboardSession(
+            self._worker_agent,
+            story_state,
+            on_scene_complete,
+            refiner_tool=self._refiner_tool,
+            refine_group_size=refine_group_size,
+        )
+
+    def call(
+        self,
+        story_state: StoryState,
+        on_scene_complete: Optional[Callable[[dict], None]] = None,
+    ) -> StoryState:
         """
         Takes the list of scenes and generates visuals for all of them in parallel.
+
+        If `on_scene_complete` is given, it is called with each scene's output
+        as soon as that scene finishes, in completion order.
         """
         if not story_state.scenes:
             logger.warning("No scenes found. Skipping storyboard generation.")
@@ -105,32 +313,21 @@ class StoryboardVisualAgent(Agent):
             f"Starting parallel visual generation for {len(story_state.scenes)} scenes..."
         )
 
+        session = self.open_session(story_state, on_scene_complete)
         try:
-
-            # Parallel Agent Executor
-            visual_outputs = []
-            with ThreadPoolExecutor() as executor:
-                # The .map() function here is from the ThreadPoolExecutor
-                # It runs the worker's call method on each scene
-                results = executor.map(self._worker_agent.call, story_state.scenes)
-                visual_outputs = list(results)
-
-            story_state.storyboard_prompts = []
-            story_state.storyboard_images = []
-
-            for output in visual_outputs:
-                if output["image_path"] != "Error":
-                    story_state.storyboard_prompts.append(
-                        {"scene_id": output["scene_id"], "prompt": output["prompt"]}
-                    )
-                    story_state.storyboard_images.append(output["image_path"])
-
-            logger.info(
-                f"Parallel visual generation complete. {len(story_state.storyboard_images)} images created."
+            # Refine every scene's prompt in a single LLM call
+            prompts = self._refiner_tool.call_batch(
+                [build_scene_text(scene) for scene in story_state.scenes],
+                metadata=story_state.metadata,
             )
 
+            for scene, prompt in zip(story_state.scenes, prompts):
+                session.submit(scene, prompt)
+
         except Exception as e:
             logger.error(f"Error during parallel storyboard generation: {e}")
             story_state.metadata["error_storyboard"] = str(e)
+            session.close()
+            return story_state
 
-        return story_state
+        return session.finish()
@@ -1,11 +1,31 @@
-from fastapi import FastAPI
+import asyncio
+import os
+import re
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import uvicorn
 
-from memory.preferences_memory import preferences_memory
-from state import story_state
-from main import StoryCrafterCoordinator
+from memory.preferences_memory import DEFAULT_USER_ID, preferences_memory
+from state.checkpoint_store import get_checkpoint_store
+from utils.circuit_breaker import CLOSED, circuit_breaker_states
+from utils.image_scheduler import get_image_scheduler
+from utils.job_manager import QueueFullError, get_job_manager
 from utils.logger import get_logger
+from utils.metrics import IMAGE_REQUESTS, JOBS, REGISTRY
+from utils.package_writer import get_package_writer
+from utils.process_pool import shutdown_process_pool
+from utils.profiling import wants_profile
+from utils.batch_runner import batch_concurrency, batch_output_path, load_results, make_item
+from utils.storyboard_pdf import PDF_AVAILABLE, get_pdf_exporter
+from utils.stage_graph import EventCallback, PipelineError, is_run_active, package_or_raise
+
+# NOTE: `pipeline` (the coordinator, the agents, the ADK and the Gemini SDK) is
+# imported inside the functions that run the pipeline, so the API starts
+# and answers health checks without loading it.
 
 logger = get_logger(__name__)
 
@@ -16,29 +36,112 @@ import json
 
 class IdeaInput(BaseModel):
     idea: str
+    user_id: str = DEFAULT_USER_ID
+
+
+class BatchIdeaInput(IdeaInput):
+    # Optional stable ID; defaults to a hash of the idea and user
+    id: Optional[str] = None
+
+
+class BatchInput(BaseModel):
+    ideas: List[BatchIdeaInput]
+    # Pass the ID of an interrupted batch to resume it
+    batch_id: Optional[str] = None
+    concurrency: Optional[int] = None
+
+
+ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Job ID of each batch that is queued or running, by batch ID
+_active_batches: Dict[str, str] = {}
+_active_batches_lock = threading.Lock()
+
+# Job ID of each resume that is queued or running, by run ID
+_active_resumes: Dict[str, str] = {}
+_active_resumes_lock = threading.Lock()
 
 
 # --- Pipeline Function (Keep as-is) ---
 
 
-def run_pipeline(idea: str) -> dict:
+def run_pipeline(
+    idea: str,
+    on_event: Optional[EventCallback] = None,
+    user_id: str = DEFAULT_USER_ID,
+    profile: bool = False,
+) -> dict:
     """
     A helper function to run the full pipeline.
     """
-    # 1. Load preferences
-    prefs = preferences_memory.load()
+    from pipeline import run_idea
+
+    # Return the final, packaged result
+    return package_or_raise(run_idea(idea, user_id, on_event=on_event, profile=profile))
+
+
+def run_pipeline_job(
+    idea: str,
+    on_event: Optional[EventCallback] = None,
+    user_id: str = DEFAULT_USER_ID,
+) -> dict:
+    """
+    Runs the pipeline for a background job, failing the job on empty output.
+    """
+    with get_job_manager().pipeline_slot():
+        final_output = run_pipeline(idea, on_event=on_event, user_id=user_id)
+    if not final_output:
+        raise Exception("Pipeline produced no output.")
+    return final_output
+
+
+def resume_pipeline_job(run_id: str) -> dict:
+    """
+    Resumes a failed run for a background job.
+    """
+    from pipeline import resume_pipeline
+
+    try:
+        with get_job_manager().pipeline_slot():
+            return package_or_raise(resume_pipeline(run_id))
+    finally:
+        with _active_resumes_lock:
+            _active_resumes.pop(run_id, None)
 
-    # 2. Create the initial state
-    initial_state = story_state.StoryState(idea=idea, preferences=prefs)
 
-    # 3. Create the Coordinator
-    coordinator = StoryCrafterCoordinator()
+def run_batch_item_job(item: Dict[str, Any], resume_run_id: Optional[str] = None) -> dict:
+    """
+    Runs one idea of a batch job, holding a pipeline slot like any other
+    job, so a batch cannot run more pipelines than jobs.max_workers.
+    """
+    from pipeline import run_batch_item
+
+    with get_job_manager().pipeline_slot():
+        return run_batch_item(item, resume_run_id)
+
+
+def run_batch_job(batch_id: str, items: List[Dict[str, Any]], concurrency: int) -> dict:
+    """
+    Runs a batch for a background job and returns its summary.
+    """
+    from pipeline import run_batch
+
+    try:
+        summary = run_batch(
+            items, batch_output_path(batch_id), concurrency, run_item=run_batch_item_job
+        )
+    finally:
+        with _active_batches_lock:
+            _active_batches.pop(batch_id, None)
+    summary["batch_id"] = batch_id
+    return summary
 
-    # 4. Run the coordinator
-    final_state = coordinator.call(initial_state)
 
-    # 5. Return the final, packaged result
-    return final_state.final_package
+def format_sse(event: str, data: dict) -> str:
+    """
+    Formats one Server-Sent Events message.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
 # --- FastAPI App ---
@@ -50,31 +153,300 @@ app = FastAPI(
 
 
 @app.post("/generate")
-def generate_story_package(input: IdeaInput):
+def generate_story_package(input: IdeaInput, x_profile: Optional[str] = Header(None)):
     """
     Run the full multi-agent pipeline to generate a video package.
+    Send `X-Profile: 1` to profile the run; the profile's path and a
+    per-stage wall vs CPU time breakdown are returned in metadata.profile.
     """
     logger.info(f"Received API request for idea: {input.idea}")
     try:
-        final_output = run_pipeline(input.idea)
+        final_output = run_pipeline(
+            input.idea, user_id=input.user_id, profile=wants_profile(x_profile)
+        )
 
         if not final_output:
             logger.error("Pipeline ran but produced no output.")
             return {"error": "Pipeline produced no output."}
 
-        # Save the final output to a file
-        output_path = "outputs/final/final_story_package.json"
-        with open(output_path, "w") as f:
-            json.dump(final_output, f, indent=2)
-        logger.info(f"Final package saved to {output_path}")
-
+        # The coordinator has queued the package to be saved as
+        # outputs/final/<run_id>.json; the response does not wait for it
         return final_output
 
+    except PipelineError as e:
+        logger.error(f"API Error: Pipeline failed with exception: {e}")
+        return {"error": "Pipeline failed", "detail": e.detail, "run_id": e.run_id}
+
     except Exception as e:
         logger.error(f"API Error: Pipeline failed with exception: {e}")
         return {"error": "Pipeline failed", "detail": str(e)}
 
 
+@app.post("/generate/stream")
+async def generate_story_stream(input: IdeaInput):
+    """
+    Run the pipeline and stream each stage's result as a Server-Sent Event.
+    """
+    logger.info(f"Received streaming request for idea: {input.idea}")
+
+    # The pipeline runs on a job worker thread. Events are handed to the
+    # event loop, so no request thread waits on the pipeline.
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_event(event: str, data: dict):
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    def run_streaming_job(idea: str, user_id: str) -> dict:
+        try:
+            return run_pipeline_job(idea, on_event=on_event, user_id=user_id)
+        finally:
+            # Sentinel: no more events for this run
+            loop.call_soon_threadsafe(events.put_nowait, None)
+
+    try:
+        job = get_job_manager().submit(run_streaming_job, input.idea, input.user_id)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    async def event_stream():
+        yield format_sse("queued", {"job_id": job.job_id})
+        while True:
+            item = await events.get()
+            if item is None:
+                break
+            event, data = item
+            yield format_sse(event, data)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/generate/batch", status_code=202)
+def generate_batch(input: BatchInput):
+    """
+    Queue many ideas as one batch job. Results are appended to the batch's
+    output as each idea finishes; poll GET /batches/{batch_id} to read them.
+    Re-posting with the same batch_id skips ideas that already succeeded.
+    """
+    batch_id = input.batch_id or uuid.uuid4().hex
+    if not ID_PATTERN.match(batch_id):
+        raise HTTPException(status_code=422, detail="Invalid batch_id")
+
+    items = [make_item(i.idea, i.user_id, i.id) for i in input.ideas]
+    concurrency = batch_concurrency(input.concurrency)
+    logger.info(f"Received batch {batch_id} with {len(items)} ideas.")
+    job_manager = get_job_manager()
+    with _active_batches_lock:
+        # Two runners on one output file would redo and duplicate unfinished ideas
+        active_job = job_manager.get(_active_batches.get(batch_id, ""))
+        if active_job is not None and not active_job.done:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Batch {batch_id} is already running as job {active_job.job_id}",
+            )
+        try:
+            job = job_manager.submit_coordinator(run_batch_job, batch_id, items, concurrency)
+        except QueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        _active_batches[batch_id] = job.job_id
+
+    return {
+        "batch_id": batch_id,
+        "job_id": job.job_id,
+        "status": job.status,
+        "total": len(items),
+    }
+
+
+@app.get("/batches/{batch_id}")
+def get_batch(batch_id: str):
+    """
+    Return the results a batch has written so far.
+    """
+    if not ID_PATTERN.match(batch_id):
+        raise HTTPException(status_code=404, detail="Batch not found")
+    output_path = batch_output_path(batch_id)
+    if not os.path.exists(output_path):
+        raise HTTPException(status_code=404, detail="Batch not found")
+    results = load_results(output_path)
+
+    records = list(results.values())
+    return {
+        "batch_id": batch_id,
+        "succeeded": sum(1 for r in records if r["status"] == "succeeded"),
+        "failed": sum(1 for r in records if r["status"] == "failed"),
+        "results": records,
+    }
+
+
+@app.post("/jobs", status_code=202)
+def create_job(input: IdeaInput):
+    """
+    Queue a pipeline run and return its job ID without waiting for it.
+    """
+    logger.info(f"Received job request for idea: {input.idea}")
+    try:
+        job = get_job_manager().submit(
+            run_pipeline_job, input.idea, user_id=input.user_id
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return {"job_id": job.job_id, "status": job.status}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Poll a job's status. The result is included once the job succeeds.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.post("/runs/{run_id}/resume", status_code=202)
+def resume_run(run_id: str):
+    """
+    Queue a failed run to restart from its first unfinished stage.
+    """
+    checkpoint = get_checkpoint_store().load(run_id)
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail="No checkpoint found for run")
+    if checkpoint[0].final_package is not None:
+        raise HTTPException(status_code=409, detail=f"Run {run_id} already succeeded")
+
+    logger.info(f"Received resume request for run: {run_id}")
+    job_manager = get_job_manager()
+    with _active_resumes_lock:
+        # Two executions of one run would overwrite each other's checkpoint and package
+        resume_job = job_manager.get(_active_resumes.get(run_id, ""))
+        if is_run_active(run_id) or (resume_job is not None and not resume_job.done):
+            raise HTTPException(status_code=409, detail=f"Run {run_id} is still running")
+        try:
+            job = job_manager.submit(resume_pipeline_job, run_id)
+        except QueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        _active_resumes[run_id] = job.job_id
+
+    return {"job_id": job.job_id, "run_id": run_id, "status": job.status}
+
+
+@app.get("/runs/{run_id}/storyboard.pdf")
+def get_storyboard_pdf(run_id: str):
+    """
+    Download a run's storyboard PDF, streamed from disk. A run without one
+    (e.g. it finished before export was enabled) gets it built from its
+    checkpoint, once its storyboard stage has completed.
+    """
+    if not PDF_AVAILABLE:
+        raise HTTPException(status_code=501, detail="PDF export needs reportlab")
+    # Run IDs become file paths, so only accept plain IDs
+    if not ID_PATTERN.match(run_id):
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    exporter = get_pdf_exporter()
+    path = exporter.path_for(run_id)
+    if not os.path.isfile(path):
+        checkpoint = get_checkpoint_store().load(run_id)
+        if checkpoint is None or not checkpoint[0].scenes:
+            raise HTTPException(status_code=404, detail="No storyboard found for run")
+
+        state, completed_stages = checkpoint
+        # A running or failed run has scenes but no images yet; building now
+        # would cache a PDF of empty frames at the run's canonical path
+        if "storyboard" not in completed_stages or not state.storyboard_images:
+            raise HTTPException(
+                status_code=409, detail="The run's storyboard has not finished yet"
+            )
+        path = exporter.export(
+            run_id,
+            state.script,
+            state.scenes,
+            state.storyboard_prompts,
+            state.storyboard_images,
+        )
+
+    return FileResponse(path, media_type="application/pdf", filename=f"storyboard_{run_id}.pdf")
+
+
+def warm_coordinator():
+    """
+    Imports the pipeline and builds the shared coordinator.
+    """
+    from pipeline import get_coordinator
+
+    get_coordinator()
+    logger.info("Pipeline warmed up.")
+
+
+@app.get("/users/{user_id}/preferences")
+def get_preferences(user_id: str):
+    """
+    Return a creator's saved preferences ({} if none are saved).
+    """
+    return preferences_memory.load(user_id)
+
+
+@app.patch("/users/{user_id}/preferences")
+def update_preferences(user_id: str, new_prefs: Dict[str, Any]):
+    """
+    Merge the given keys into a creator's saved preferences.
+    """
+    return preferences_memory.update(new_prefs, user_id=user_id)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Expose latency histograms, token and error counters, and in-flight
+    gauges in the Prometheus text format.
+    """
+    for status, count in get_job_manager().counts().items():
+        JOBS.set(count, status=status)
+    image_stats = get_image_scheduler().stats()
+    IMAGE_REQUESTS.set(image_stats["queued"], state="queued")
+    IMAGE_REQUESTS.set(image_stats["in_flight"], state="in_flight")
+    # Moves breakers whose recovery timeout has passed to half-open
+    circuit_breaker_states()
+
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/health")
+def health():
+    """
+    Report whether the API is up, and the circuit breaker of each external
+    service. "degraded" means calls to at least one service are being
+    skipped or trialled.
+    """
+    breakers = circuit_breaker_states()
+    degraded = any(breaker["state"] != CLOSED for breaker in breakers.values())
+    return {"status": "degraded" if degraded else "ok", "circuit_breakers": breakers}
+
+
+@app.on_event("startup")
+def start_warm_up():
+    # Warm up in the background so the server accepts requests right away;
+    # the first pipeline request waits on the same import if it is early
+    threading.Thread(target=warm_coordinator, name="warm-up", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def shutdown_job_manager():
+    get_job_manager().shutdown(wait=False)
+    # Finish writing packages that are still queued
+    get_package_writer().shutdown(wait=True)
+    shutdown_process_pool(wait=False)
+
+
 @app.get("/")
 def read_root():
     return {
@@ -85,5 +457,7 @@ def read_root():
 # --- Main execution block ---
 
 if __name__ == "__main__":
+    import uvicorn
+
     logger.info("Starting StoryCrafter API server...")
     uvicorn.run(app, host="0.0.0.0", port=8000)
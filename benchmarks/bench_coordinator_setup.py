@@ -0,0 +1,57 @@
+"""
+Measures the per-request setup cost saved by sharing one coordinator.
+
+Compares building a fresh StoryCrafterCoordinator (five Gemini models, the
+prompt refiner, image and hashtag tools) against fetching the shared one
+from get_coordinator(). No API calls are made.
+
+Run from the project root:
+    python -m benchmarks.bench_coordinator_setup --iterations 20
+"""
+
+import argparse
+import statistics
+import time
+
+from pipeline import StoryCrafterCoordinator, get_coordinator
+
+
+def time_calls(fn, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(label: str, timings: list):
+    timings_ms = sorted(t * 1000 for t in timings)
+    p95 = timings_ms[max(0, int(len(timings_ms) * 0.95) - 1)]
+    print(
+        f"{label:<28} mean={statistics.mean(timings_ms):9.3f} ms  "
+        f"p50={statistics.median(timings_ms):9.3f} ms  p95={p95:9.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    # Warm imports and the shared instance so neither side pays for them
+    get_coordinator()
+
+    per_request = time_calls(StoryCrafterCoordinator, args.iterations)
+    shared = time_calls(get_coordinator, args.iterations)
+
+    print(f"Coordinator setup over {args.iterations} iterations:")
+    summarize("new coordinator per request", per_request)
+    summarize("shared coordinator", shared)
+
+    saved_ms = (statistics.mean(per_request) - statistics.mean(shared)) * 1000
+    print(f"Saved per request: {saved_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
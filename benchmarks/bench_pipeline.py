@@ -0,0 +1,263 @@
+"""
+Measures end-to-end pipeline throughput offline, at several concurrency levels.
+
+Gemini, Stablecog and Tavily are replaced by the local fakes in
+benchmarks.fakes, so no API quota is spent. The fakes' latency, error rate
+and image size are set from the command line. Runs go through either
+pipeline.run_pipeline directly or the FastAPI app's POST /generate, and each
+level reports p50/p95/p99 latency and stories per minute.
+
+Everything the runs write (checkpoints, images, preferences) goes to a
+temporary directory.
+
+Run from the project root:
+    python -m benchmarks.bench_pipeline --runs 16 --concurrency 1,4,8
+    python -m benchmarks.bench_pipeline --target api --error-rate 0.02
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import yaml
+
+from benchmarks.fakes import (
+    Distribution,
+    FakeProfile,
+    FakeStablecogServer,
+    fake_model_factory,
+    fake_search_client_factory,
+)
+
+IDEA = "A short sci-fi video about an engineer who follows a signal into a ruined city"
+
+MODEL_KEYS = (
+    "idea_expansion",
+    "script_writer",
+    "scene_breakdown",
+    "social_optimizer",
+    "prompt_refiner",
+)
+
+
+def write_settings(
+    workdir: str, api_url: str, max_concurrency: int, hedge_after_ms: Optional[float] = None
+) -> str:
+    """
+    Writes a settings.yaml that keeps every output inside `workdir`,
+    disables the LLM cache and points image generation at the fake server.
+    Gemini calls are hedged after `hedge_after_ms`, if given.
+    """
+    settings = {
+        "api_keys": {"google_api_key": "offline"},
+        "models": {key: "fake-gemini" for key in MODEL_KEYS},
+        "paths": {
+            name: os.path.join(workdir, name)
+            for name in (
+                "final",
+                "images",
+                "prompts",
+                "scenes",
+                "scripts",
+                "checkpoints",
+                "storyboards",
+            )
+        },
+        "memory": {
+            "preferences_file": os.path.join(workdir, "preferences.json"),
+            "preferences_db": os.path.join(workdir, "preferences.db"),
+        },
+        "jobs": {"max_workers": max_concurrency, "max_queue_size": 1000},
+        "http": {"pool_maxsize": max(32, max_concurrency * 8)},
+        "image_generation": {
+            "api_url": api_url,
+            "rate_per_sec": 1000,
+            "burst": 1000,
+            "max_in_flight": max(8, max_concurrency * 8),
+        },
+        "llm_cache": {"enabled": False},
+        "llm_retry": {
+            "hedge_after_sec": hedge_after_ms / 1000 if hedge_after_ms else None,
+        },
+    }
+    path = os.path.join(workdir, "settings.yaml")
+    with open(path, "w") as f:
+        yaml.safe_dump(settings, f)
+    return path
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_level(
+    run_once: Callable[[int], None], runs: int, concurrency: int
+) -> Tuple[List[float], int, float]:
+    """
+    Runs `run_once` `runs` times, `concurrency` at a time. Returns the
+    latencies of successful runs, the failure count and the wall time.
+    """
+
+    def timed(i: int):
+        start = time.perf_counter()
+        try:
+            run_once(i)
+            return time.perf_counter() - start
+        except Exception as e:
+            print(f"  run {i} failed: {e}")
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, range(runs)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(r for r in results if r is not None)
+    return latencies, runs - len(latencies), wall
+
+
+def summarize(concurrency: int, latencies: List[float], failures: int, wall: float) -> dict:
+    row = {
+        "concurrency": concurrency,
+        "succeeded": len(latencies),
+        "failed": failures,
+        "wall_sec": round(wall, 3),
+        "stories_per_min": round(len(latencies) / wall * 60, 2) if wall else 0.0,
+    }
+    if latencies:
+        row.update(
+            p50_sec=round(statistics.median(latencies), 3),
+            p95_sec=round(percentile(latencies, 95), 3),
+            p99_sec=round(percentile(latencies, 99), 3),
+        )
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", choices=("pipeline", "api"), default="pipeline")
+    parser.add_argument("--runs", type=int, default=16, help="Runs per concurrency level.")
+    parser.add_argument("--concurrency", default="1,4,8", help="Comma-separated levels.")
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--image-latency-ms", type=float, default=3000)
+    parser.add_argument("--search-latency-ms", type=float, default=600)
+    parser.add_argument(
+        "--latency-spread",
+        type=float,
+        default=0.3,
+        help="Log-normal sigma applied to every latency (0 = constant).",
+    )
+    parser.add_argument("--image-kb", type=float, default=300)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--hedge-after-ms",
+        type=float,
+        help="Hedge Gemini calls slower than this (default: no hedging).",
+    )
+    parser.add_argument("--shots", type=int, default=8, help="Shots per storyboard.")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON.")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    spread = args.latency_spread
+    profile = FakeProfile(
+        llm_latency_ms=Distribution(args.llm_latency_ms, spread),
+        image_latency_ms=Distribution(args.image_latency_ms, spread),
+        image_kb=Distribution(args.image_kb, spread),
+        search_latency_ms=Distribution(args.search_latency_ms, spread),
+        error_rate=args.error_rate,
+        shots=args.shots,
+    )
+
+    server = FakeStablecogServer(profile).start()
+    workdir = tempfile.mkdtemp(prefix="storycrafter-bench-")
+
+    # The tools read their keys (and the logger its level) when first imported
+    os.environ["STABLECOG_API_KEY"] = "offline"
+    os.environ["TAVILY_API_KEY"] = "offline"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    # Point every module at the benchmark settings before any of them loads it
+    import utils.config
+
+    utils.config.CONFIG_PATH = write_settings(
+        workdir, server.api_url, max(levels), args.hedge_after_ms
+    )
+
+    from tools.hashtag_tool import set_search_client_factory
+    from utils.llm import set_model_factory
+
+    set_model_factory(fake_model_factory(profile))
+    set_search_client_factory(fake_search_client_factory(profile))
+
+    client = None
+    if args.target == "pipeline":
+        import pipeline
+
+        def run_once(i: int):
+            if not pipeline.run_pipeline(f"{IDEA} (#{i})"):
+                raise RuntimeError("pipeline produced no package")
+
+    else:
+        from fastapi.testclient import TestClient
+
+        import api
+
+        client = TestClient(api.app).__enter__()
+
+        def run_once(i: int):
+            response = client.post("/generate", json={"idea": f"{IDEA} (#{i})"})
+            response.raise_for_status()
+            body = response.json()
+            if "error" in body:
+                raise RuntimeError(body.get("detail", body["error"]))
+
+    # Build the shared coordinator up front so setup is not measured
+    from pipeline import get_coordinator
+
+    get_coordinator()
+
+    print(
+        f"Offline {args.target} benchmark: {args.runs} runs per level, "
+        f"LLM {args.llm_latency_ms:.0f} ms, image {args.image_latency_ms:.0f} ms, "
+        f"search {args.search_latency_ms:.0f} ms, spread {spread}, "
+        f"error rate {args.error_rate:.1%}, {args.shots} shots, "
+        f"hedge after {args.hedge_after_ms or 'off'} ms"
+    )
+    print(
+        f"{'conc':>5} {'ok':>5} {'fail':>5} {'p50 s':>8} {'p95 s':>8} "
+        f"{'p99 s':>8} {'stories/min':>12}"
+    )
+
+    rows = []
+    try:
+        for concurrency in levels:
+            latencies, failures, wall = run_level(run_once, args.runs, concurrency)
+            row = summarize(concurrency, latencies, failures, wall)
+            rows.append(row)
+            print(
+                f"{concurrency:>5} {row['succeeded']:>5} {row['failed']:>5} "
+                f"{row.get('p50_sec', float('nan')):>8.2f} "
+                f"{row.get('p95_sec', float('nan')):>8.2f} "
+                f"{row.get('p99_sec', float('nan')):>8.2f} "
+                f"{row['stories_per_min']:>12.1f}"
+            )
+    finally:
+        if client is not None:
+            client.__exit__(None, None, None)
+        server.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"target": args.target, "args": vars(args), "results": rows}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Measures cold-start cost and guards it against regressions.
+
+Each iteration starts a fresh Python process and records:
+- the time to `import api`
+- the time from process start of the import to the first `/` response
+- which heavy modules (ADK, Gemini SDK, Tavily) `import api` pulled in
+
+The script exits with status 1 if a median exceeds its budget or a heavy
+module is loaded at import time, so it can run as a CI check.
+
+Run from the project root:
+    python -m benchmarks.bench_startup --iterations 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Modules that must only be loaded when a pipeline actually runs
+HEAVY_MODULES = ("google.adk", "google.generativeai", "tavily", "pipeline")
+
+PROBE = """
+import json, sys, time
+
+start = time.perf_counter()
+import api
+import_sec = time.perf_counter() - start
+loaded = [m for m in {heavy!r} if m in sys.modules]
+
+from fastapi.testclient import TestClient
+
+with TestClient(api.app) as client:
+    response = client.get("/")
+first_response_sec = time.perf_counter() - start
+
+print(json.dumps({{
+    "import_sec": import_sec,
+    "first_response_sec": first_response_sec,
+    "status_code": response.status_code,
+    "heavy_modules_loaded": loaded,
+}}))
+"""
+
+
+def run_probe() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=1500)
+    parser.add_argument("--max-first-response-ms", type=float, default=3000)
+    args = parser.parse_args()
+
+    samples = [run_probe() for _ in range(args.iterations)]
+
+    import_ms = statistics.median(s["import_sec"] for s in samples) * 1000
+    first_response_ms = statistics.median(s["first_response_sec"] for s in samples) * 1000
+    heavy_loaded = sorted({m for s in samples for m in s["heavy_modules_loaded"]})
+    bad_status = [s["status_code"] for s in samples if s["status_code"] != 200]
+
+    print(f"Startup over {args.iterations} fresh processes (median):")
+    print(f"  import api:          {import_ms:9.1f} ms  (budget {args.max_import_ms:.0f} ms)")
+    print(f"  first '/' response:  {first_response_ms:9.1f} ms  (budget {args.max_first_response_ms:.0f} ms)")
+    print(f"  heavy modules at import: {heavy_loaded or 'none'}")
+
+    failures = []
+    if import_ms > args.max_import_ms:
+        failures.append("import time over budget")
+    if first_response_ms > args.max_first_response_ms:
+        failures.append("first response time over budget")
+    if heavy_loaded:
+        failures.append(f"heavy modules loaded at import: {', '.join(heavy_loaded)}")
+    if bad_status:
+        failures.append(f"'/' returned {bad_status}")
+
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Local stand-ins for Gemini, Stablecog and Tavily, so the pipeline can be
+benchmarked end to end without network access or API quota.
+
+- FakeGenerativeModel replaces genai.GenerativeModel through
+  utils.llm.set_model_factory. It returns well-formed JSON for each agent
+  and streams in chunks when asked to.
+- FakeStablecogServer is a real HTTP server on localhost that mimics the
+  generation endpoint and serves the generated image bytes, so the pooled
+  session, timeouts and chunked downloads are all exercised. Each image is
+  a real 1024x1024 JPEG padded to the sampled size, so post-processing
+  decodes it too.
+- FakeTavilyClient replaces TavilyClient through
+  tools.hashtag_tool.set_search_client_factory.
+
+Every fake draws its latency (and the server its image size) from a
+Distribution and fails with a configurable probability.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import io
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+
+from PIL import Image, ImageFilter
+
+# The image path the fake server hands out in its generation responses
+IMAGE_ROUTE = "/images/"
+
+
+@dataclass
+class Distribution:
+    """
+    A log-normal distribution described by its median and spread (the
+    sigma of the underlying normal). A spread of 0 is a constant.
+    """
+
+    median: float
+    spread: float = 0.0
+
+    def sample(self) -> float:
+        if self.spread <= 0:
+            return self.median
+        return random.lognormvariate(0, self.spread) * self.median
+
+
+@dataclass
+class FakeProfile:
+    """
+    Latency, error and size settings for every fake.
+    """
+
+    llm_latency_ms: Distribution = field(default_factory=lambda: Distribution(800, 0.3))
+    llm_chunks: int = 8
+    image_latency_ms: Distribution = field(default_factory=lambda: Distribution(3000, 0.4))
+    image_kb: Distribution = field(default_factory=lambda: Distribution(300, 0.2))
+    search_latency_ms: Distribution = field(default_factory=lambda: Distribution(600, 0.3))
+    error_rate: float = 0.0
+    script_scenes: int = 5
+    shots: int = 8
+
+
+def _sleep_ms(distribution: Distribution):
+    time.sleep(distribution.sample() / 1000)
+
+
+class InjectedFailure(RuntimeError):
+    """
+    A transient failure, marked 503 like a google.api_core error, so the
+    pipeline's retry logic treats it as retryable.
+    """
+
+    code = 503
+
+
+def _maybe_fail(profile: FakeProfile, service: str):
+    if random.random() < profile.error_rate:
+        raise InjectedFailure(f"Injected {service} failure")
+
+
+# --- Gemini ---
+class _Usage:
+    def __init__(self, total_token_count: int):
+        self.total_token_count = total_token_count
+
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeResponse:
+    """
+    A generate_content response. When streamed, iterating yields the text in
+    chunks spread over the call's latency.
+    """
+
+    def __init__(self, text: str, prompt: str, delay_sec: float, chunks: int):
+        self.text = text
+        self.usage_metadata = _Usage((len(prompt) + len(text)) // 4)
+        self._delay_sec = delay_sec
+        self._chunks = max(1, chunks)
+
+    def __iter__(self) -> Iterator[_Chunk]:
+        size = -(-len(self.text) // self._chunks)
+        for start in range(0, len(self.text), size):
+            time.sleep(self._delay_sec / self._chunks)
+            yield _Chunk(self.text[start : start + size])
+
+
+class FakeGenerativeModel:
+    """
+    Answers like the Gemini model behind one agent, identified by its
+    config model key. Each answer carries a fresh nonce, so the LLM cache
+    and image store never turn a benchmark run into a cache hit.
+    """
+
+    def __init__(
+        self,
+        profile: FakeProfile,
+        model_key: str,
+        model_name: str,
+        system_instruction: Optional[str] = None,
+        generation_config: Optional[Dict[str, Any]] = None,
+    ):
+        self.profile = profile
+        self.model_key = model_key
+        self.model_name = model_name
+        self.json_output = (generation_config or {}).get("response_mime_type") == "application/json"
+
+    def generate_content(self, prompt: str, stream: bool = False) -> FakeResponse:
+        _maybe_fail(self.profile, "gemini")
+        delay_sec = self.profile.llm_latency_ms.sample() / 1000
+        text = self._answer(prompt, uuid.uuid4().hex[:8])
+        response = FakeResponse(text, prompt, delay_sec, self.profile.llm_chunks)
+        if not stream:
+            time.sleep(delay_sec)
+        return response
+
+    def _answer(self, prompt: str, nonce: str) -> str:
+        profile = self.profile
+        if self.model_key == "idea_expansion":
+            return json.dumps(
+                {
+                    "theme": f"Curiosity {nonce}",
+                    "genre": "Sci-Fi",
+                    "characters": [{"name": "Ada", "description": "A restless engineer"}],
+                    "mood": "Suspenseful",
+                    "estimated_duration_sec": 30,
+                    "cinematic_summary": f"A lone engineer chases a signal ({nonce}).",
+                }
+            )
+        if self.model_key == "script_writer":
+            return json.dumps(
+                {
+                    "title": f"The Signal {nonce}",
+                    "logline": "An engineer follows a signal to its source.",
+                    "scenes": [
+                        {
+                            "scene_number": n,
+                            "location": "EXT. RUINED CITY - NIGHT",
+                            "action": f"Ada moves toward the signal, step {n}.",
+                            "dialogue": [{"character": "Ada", "line": "Almost there."}],
+                            "voiceover": "It had been calling for years. " * 3,
+                        }
+                        for n in range(1, profile.script_scenes + 1)
+                    ],
+                    "total_duration_sec": 30,
+                }
+            )
+        if self.model_key == "scene_breakdown":
+            return json.dumps(
+                {
+                    "scenes": [
+                        {
+                            "scene_id": n,
+                            "shot_description": f"Ada silhouetted against ruins ({nonce}-{n}).",
+                            "camera_angle": "Wide Shot",
+                            "location": "Ruined city",
+                            "key_action": "Ada walks toward a glowing antenna.",
+                        }
+                        for n in range(1, profile.shots + 1)
+                    ]
+                }
+            )
+        if self.model_key == "social_optimizer":
+            return json.dumps(
+                {
+                    "caption": f"Some signals should stay lost. {nonce}",
+                    "hashtags": ["#scifi", "#shorts"],
+                    "thumbnail_text_ideas": ["IT'S CALLING", "DON'T ANSWER", "THE SIGNAL"],
+                    "best_post_time": "6:30 PM",
+                    "video_title_variants": ["The Signal", "Static", "Last Broadcast"],
+                }
+            )
+        if self.model_key == "prompt_refiner" and self.json_output:
+            scenes = json.loads(prompt).get("scenes", [])
+            return json.dumps(
+                {"prompts": [f"Cinematic, moody, 8K: {s['scene_text']} [{nonce}]" for s in scenes]}
+            )
+        return f"Cinematic, moody, 8K: {prompt} [{nonce}]"
+
+
+def fake_model_factory(profile: FakeProfile):
+    """
+    Returns a factory for utils.llm.set_model_factory.
+    """
+
+    def factory(model_key, model_name, system_instruction=None, generation_config=None):
+        return FakeGenerativeModel(
+            profile, model_key, model_name, system_instruction, generation_config
+        )
+
+    return factory
+
+
+# --- Stablecog ---
+class FakeStablecogServer:
+    """
+    Serves POST /v1/image/generation/create and GET /images/<id>.jpeg on a
+    free localhost port, in a background thread.
+    """
+
+    def __init__(self, profile: FakeProfile):
+        self.profile = profile
+        self._sizes: Dict[str, int] = {}
+        self._jpeg = self._encode_frame()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/v1/image/generation/create"
+
+    def start(self) -> "FakeStablecogServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def _encode_frame() -> bytes:
+        # Encoded once; decoders stop at the end-of-image marker, so random
+        # padding after it brings each response up to its sampled size
+        # Smooth gradients with some grain: cheaper to re-encode than pure
+        # noise, and closer to a real frame
+        size = (1024, 1024)
+        frame = Image.merge(
+            "RGB",
+            (
+                Image.linear_gradient("L").resize(size),
+                Image.radial_gradient("L").resize(size),
+                Image.effect_noise(size, 20).filter(ImageFilter.GaussianBlur(2)),
+            ),
+        )
+        buffer = io.BytesIO()
+        frame.save(buffer, "JPEG", quality=75)
+        return buffer.getvalue()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this,
+            # delayed ACKs add ~40 ms to every response
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                _sleep_ms(server.profile.image_latency_ms)
+                if random.random() < server.profile.error_rate:
+                    self._send(500, b'{"error":"injected"}', "application/json")
+                    return
+
+                image_id = uuid.uuid4().hex
+                size = max(1, int(server.profile.image_kb.sample() * 1024))
+                with server._lock:
+                    server._sizes[image_id] = size
+                body = json.dumps(
+                    {"outputs": [{"url": f"{server.base_url}{IMAGE_ROUTE}{image_id}.jpeg"}]}
+                )
+                self._send(200, body.encode("utf-8"), "application/json")
+
+            def do_GET(self):
+                image_id = os.path.splitext(os.path.basename(self.path))[0]
+                with server._lock:
+                    size = server._sizes.pop(image_id, None)
+                if not self.path.startswith(IMAGE_ROUTE) or size is None:
+                    self._send(404, b"", "text/plain")
+                    return
+                body = server._jpeg + os.urandom(max(0, size - len(server._jpeg)))
+                self._send(200, body, "image/jpeg")
+
+        return Handler
+
+
+# --- Tavily ---
+class FakeTavilyClient:
+    """
+    Answers search() with a few snippets full of hashtags.
+    """
+
+    def __init__(self, profile: FakeProfile, api_key: Optional[str] = None):
+        self.profile = profile
+
+    def search(self, query: str, **kwargs) -> Dict[str, List[Dict[str, str]]]:
+        _sleep_ms(self.profile.search_latency_ms)
+        _maybe_fail(self.profile, "tavily")
+        return {
+            "results": [
+                {"content": f"Top picks for {query}: #shorts #viral #fyp #scifi #storytime"},
+                {"content": "Creators are using #horror #mystery #cinematic this week."},
+            ]
+        }
+
+
+def fake_search_client_factory(profile: FakeProfile):
+    """
+    Returns a factory for tools.hashtag_tool.set_search_client_factory.
+    """
+    return lambda api_key: FakeTavilyClient(profile, api_key)
@@ -1,31 +1,130 @@
+import copy
 import json
 import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict
+
 from utils.config import load_config
 
+DEFAULT_USER_ID = "default"
+
 
 class PreferencesMemory:
+    """
+    Long-term creator preferences, one record per user, stored in SQLite.
+
+    The database runs in WAL mode so readers never block the writer. Reads go
+    through an in-memory cache that is invalidated on every write from this
+    process; entries also expire after a TTL so writes from other processes
+    are picked up. update() is an atomic read-modify-write.
+
+    The legacy preferences JSON file is imported as the default user's
+    preferences the first time the database is created.
+    """
+
     def __init__(self):
-        config = load_config()
-        self.file_path = config["memory"]["preferences_file"]
-        self._ensure_file()
+        memory_config = load_config()["memory"]
+        self.file_path = memory_config["preferences_file"]
+        self.db_path = memory_config.get("preferences_db", "memory/preferences.db")
+        self.cache_ttl_sec = memory_config.get("preferences_cache_ttl_sec", 60)
 
-    def _ensure_file(self):
-        if not os.path.exists(self.file_path):
-            with open(self.file_path, "w") as f:
-                json.dump({}, f)
+        self._local = threading.local()
+        self._cache: Dict[str, tuple] = {}
+        self._cache_lock = threading.Lock()
+        # Bumped on every write so a read that raced a write is not cached
+        self._generation = 0
+
+        self._ensure_schema()
+        self._import_legacy_file()
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
 
-    def load(self):
+    def _ensure_schema(self):
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS preferences (
+                user_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+
+    def _import_legacy_file(self):
+        if not os.path.exists(self.file_path):
+            return
         with open(self.file_path, "r") as f:
-            return json.load(f)
+            legacy_prefs = json.load(f)
+        self._connect().execute(
+            "INSERT OR IGNORE INTO preferences (user_id, data, updated_at) VALUES (?, ?, ?)",
+            (DEFAULT_USER_ID, json.dumps(legacy_prefs), time.time()),
+        )
+
+    def _read(self, conn: sqlite3.Connection, user_id: str) -> Dict[str, Any]:
+        row = conn.execute(
+            "SELECT data FROM preferences WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _write(self, conn: sqlite3.Connection, user_id: str, preferences: dict):
+        conn.execute(
+            """
+            INSERT INTO preferences (user_id, data, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE
+            SET data = excluded.data, updated_at = excluded.updated_at
+            """,
+            (user_id, json.dumps(preferences), time.time()),
+        )
+
+    def _invalidate(self, user_id: str):
+        with self._cache_lock:
+            self._cache.pop(user_id, None)
+            self._generation += 1
+
+    def load(self, user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
+        with self._cache_lock:
+            entry = self._cache.get(user_id)
+            if entry is not None and time.time() - entry[0] <= self.cache_ttl_sec:
+                return copy.deepcopy(entry[1])
+            generation = self._generation
+
+        preferences = self._read(self._connect(), user_id)
+
+        with self._cache_lock:
+            if generation == self._generation:
+                self._cache[user_id] = (time.time(), preferences)
+        return copy.deepcopy(preferences)
 
-    def save(self, preferences: dict):
-        with open(self.file_path, "w") as f:
-            json.dump(preferences, f, indent=2)
+    def save(self, preferences: dict, user_id: str = DEFAULT_USER_ID):
+        self._write(self._connect(), user_id, preferences)
+        self._invalidate(user_id)
 
-    def update(self, new_prefs: dict):
-        prefs = self.load()
-        prefs.update(new_prefs)
-        self.save(prefs)
+    def update(self, new_prefs: dict, user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
+        conn = self._connect()
+        # BEGIN IMMEDIATE takes the write lock before reading, so concurrent
+        # updates (from any thread or process) cannot lose each other's keys
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            prefs = self._read(conn, user_id)
+            prefs.update(new_prefs)
+            self._write(conn, user_id, prefs)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            self._invalidate(user_id)
+        return prefs
 
 
 preferences_memory = PreferencesMemory()
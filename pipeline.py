@@ -0,0 +1,454 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from google.adk.agents import Agent  # <-- Corrected import
+from state.checkpoint_store import get_checkpoint_store
+from state.story_state import StoryState
+from memory.session_memory import get_session_memory
+from memory.preferences_memory import DEFAULT_USER_ID, preferences_memory
+from pydantic import PrivateAttr
+
+# Import all our agents
+from agents.idea_expansion_agent import IdeaExpansionAgent
+from agents.script_writer_agent import ScriptWriterAgent
+from agents.scene_breakdown_agent import SceneBreakdownAgent
+from agents.storyboard_visual_agent import StoryboardSession, StoryboardVisualAgent
+from agents.storyboard_postprocess_agent import StoryboardPostProcessAgent
+from agents.storyboard_export_agent import StoryboardExportAgent
+from agents.social_optimizer_agent import SocialOptimizationAgent
+
+# Import utils
+from utils.env import load_env
+from utils.config import load_config
+from utils.file_utils import ensure_directories
+from utils.logger import get_logger, log_context
+from utils.metrics import PIPELINE_DURATION, PIPELINES_IN_FLIGHT
+from utils.package_writer import get_package_writer
+from utils.profiling import profile_run
+from utils.batch_runner import BatchItemFn, BatchRunner, batch_concurrency
+from utils.storyboard_pdf import PDF_AVAILABLE
+from utils.stage_graph import (
+    EventCallback,
+    RunConflictError,
+    Stage,
+    StageGraph,
+    claim_run,
+    package_or_raise,
+)
+
+# --- Setup ---
+load_env()
+load_config()
+ensure_directories()
+logger = get_logger(__name__)
+
+# The event emitted when each stage finishes
+STAGE_EVENTS = {
+    "idea_expansion": "idea_expanded",
+    "script_writer": "script_written",
+    "scene_breakdown": "scenes_ready",
+    "storyboard": "storyboard_complete",
+    "postprocess": "storyboard_assets_ready",
+    "export": "storyboard_pdf_ready",
+    "social_optimizer": "social_ready",
+}
+
+# --- Coordinator Definition ---
+
+
+class StoryCrafterCoordinator(Agent):
+    """
+    The main Coordinator Agent.
+    It runs the agents as a dependency graph to build the story.
+    """
+
+    name: str = "story_crafter_coordinator"
+    description: str = "The main coordinator for the StoryCrafter pipeline."
+
+    # -- ANNOTATIONS --
+    _idea_expander: IdeaExpansionAgent = PrivateAttr()
+    _script_writer: ScriptWriterAgent = PrivateAttr()
+    _scene_breaker: SceneBreakdownAgent = PrivateAttr()
+    _visual_generator: StoryboardVisualAgent = PrivateAttr()
+    _social_optimizer: SocialOptimizationAgent = PrivateAttr()
+    _postprocessor: Optional[StoryboardPostProcessAgent] = PrivateAttr()
+    _exporter: Optional[StoryboardExportAgent] = PrivateAttr()
+    _stream_scenes: bool = PrivateAttr()
+    _refine_group_size: int = PrivateAttr()
+
+    def __init__(self):
+        super().__init__()
+        # Start storyboard images while the scene breakdown is still streaming
+        pipeline_config = load_config().get("pipeline", {})
+        self._stream_scenes = pipeline_config.get("stream_scenes", True)
+        # Streamed scenes are refined this many per LLM call
+        self._refine_group_size = pipeline_config.get("stream_refine_group_size", 4)
+
+        # Instantiate all the agents the coordinator will use
+        self._idea_expander = IdeaExpansionAgent()
+        self._script_writer = ScriptWriterAgent()
+        self._scene_breaker = SceneBreakdownAgent()
+        self._visual_generator = StoryboardVisualAgent()
+        self._social_optimizer = SocialOptimizationAgent()
+        self._postprocessor = None
+        if load_config().get("postprocess", {}).get("enabled", True):
+            self._postprocessor = StoryboardPostProcessAgent()
+        self._exporter = None
+        if load_config().get("export", {}).get("enabled", True) and PDF_AVAILABLE:
+            self._exporter = StoryboardExportAgent()
+        logger.info("Coordinator initialized with all agents.")
+
+    def call(
+        self,
+        state: StoryState,
+        on_event: Optional[EventCallback] = None,
+        completed_stages: Iterable[str] = (),
+        profile: bool = False,
+    ) -> StoryState:
+        """
+        Executes the full agent pipeline (see _run).
+
+        A successful run's final package is saved to its own file, named by
+        run ID, on a background thread. Raises RunConflictError if the run
+        is already executing in this process.
+
+        With `profile`, the run is profiled across all of its threads. The
+        profile is saved as <run_id>.prof next to the final packages, and
+        each stage's wall-clock and CPU time is added to metadata["profile"].
+        """
+        with log_context(run_id=state.run_id), claim_run(state.run_id):
+            if profile:
+                final_dir = load_config().paths.get("final", "outputs/final")
+                with profile_run(state.run_id, final_dir) as profiler:
+                    state = self._run(state, on_event, completed_stages)
+
+                # The final package shares this metadata dict, so it is included there too
+                state.metadata["profile"] = {
+                    "path": profiler.path,
+                    "sections": profiler.breakdown(),
+                }
+            else:
+                state = self._run(state, on_event, completed_stages)
+
+            # Saved to <run_id>.json in the background; callers do not wait
+            if state.final_package is not None:
+                get_package_writer().submit(state.final_package)
+
+        return state
+
+    def _run(
+        self,
+        state: StoryState,
+        on_event: Optional[EventCallback] = None,
+        completed_stages: Iterable[str] = (),
+    ) -> StoryState:
+        """
+        Executes the full agent pipeline, running independent stages
+        concurrently.
+
+        If `on_event` is given, it is called with each stage's result as soon
+        as that stage finishes, so callers can stream partial output.
+
+        The state is checkpointed under its run ID after every stage. Stages
+        listed in `completed_stages` are skipped, which is how a failed run
+        is resumed from its checkpoint.
+
+        Per-stage timings, external call latencies and the total duration are
+        recorded in the state's metadata, and so in the final package.
+        """
+        completed = set(completed_stages)
+        checkpoints = get_checkpoint_store()
+        state.metadata.pop("pipeline_error", None)
+
+        def save_checkpoint():
+            try:
+                checkpoints.save(state, completed)
+            except Exception as e:
+                logger.warning(f"Could not checkpoint run {state.run_id}: {e}")
+
+        def emit(event: str, data: Dict[str, Any]):
+            if on_event is None:
+                return
+            try:
+                on_event(event, data)
+            except Exception as e:
+                logger.warning(f"Event callback failed for '{event}': {e}")
+
+        def on_stage_complete(stage: Stage):
+            completed.add(stage.name)
+            save_checkpoint()
+            data = {field_name: getattr(state, field_name) for field_name in stage.outputs}
+            emit(STAGE_EVENTS[stage.name], data)
+
+        status = "failed"
+        start = time.perf_counter()
+        PIPELINES_IN_FLIGHT.inc()
+
+        session = None
+        if self._stream_scenes:
+            session = self._visual_generator.open_session(
+                state,
+                on_scene_complete=lambda output: emit("storyboard_image", output),
+                refine_group_size=self._refine_group_size,
+            )
+
+        try:
+            logger.info(f"--- Pipeline Start (run {state.run_id}) ---")
+            emit("pipeline_started", {"idea": state.idea, "run_id": state.run_id})
+            save_checkpoint()
+
+            # Agents 1-5 and post-processing, scheduled by their data dependencies
+            graph = self._build_stage_graph(emit, session)
+            state = graph.run(
+                state,
+                on_stage_complete=on_stage_complete,
+                completed_stages=completed,
+            )
+
+            # Final Step: Package the output
+            logger.info("Packaging final output...")
+            state.metadata["pipeline_duration_sec"] = round(time.perf_counter() - start, 3)
+            state = self._create_final_package(state)
+            status = "succeeded"
+            # Records the success, so the run is not resumed again
+            save_checkpoint()
+
+            logger.info("--- Pipeline Complete ---")
+            emit("pipeline_complete", {"final_package": state.final_package})
+        except Exception as e:
+            logger.error(f"Pipeline failed: {e}. Resume with run ID {state.run_id}.")
+            state.metadata["pipeline_error"] = str(e)
+            emit("pipeline_error", {"detail": str(e), "run_id": state.run_id})
+        finally:
+            if session is not None:
+                session.close()
+            PIPELINES_IN_FLIGHT.dec()
+            PIPELINE_DURATION.observe(time.perf_counter() - start, status=status)
+
+        return state
+
+    def _build_stage_graph(
+        self, emit: EventCallback, session: Optional[StoryboardSession] = None
+    ) -> StageGraph:
+        """
+        Declares each agent as a stage with the StoryState fields it reads
+        and writes. Social optimization only needs the script and concept,
+        so it runs alongside scene breakdown and the storyboard.
+
+        With a storyboard `session`, scene breakdown streams each shot into
+        the session as soon as it is parsed, and the storyboard stage only
+        waits for the images already in flight.
+        """
+        if session is not None:
+            run_scene_breakdown = lambda state: self._scene_breaker.call(
+                state, on_scene=session.submit
+            )
+            run_storyboard = lambda state: session.finish()
+        else:
+            run_scene_breakdown = self._scene_breaker.call
+            run_storyboard = lambda state: self._visual_generator.call(
+                state,
+                on_scene_complete=lambda output: emit("storyboard_image", output),
+            )
+
+        stages = [
+            Stage(
+                name="idea_expansion",
+                run=self._idea_expander.call,
+                inputs=("idea",),
+                outputs=("expanded_idea",),
+                error_key="error_idea_expansion",
+            ),
+            Stage(
+                name="script_writer",
+                run=self._script_writer.call,
+                inputs=("expanded_idea",),
+                outputs=("script",),
+                error_key="error_script_writer",
+            ),
+            Stage(
+                name="scene_breakdown",
+                run=run_scene_breakdown,
+                inputs=("script",),
+                outputs=("scenes",),
+                error_key="error_scene_breakdown",
+            ),
+            Stage(
+                name="storyboard",
+                run=run_storyboard,
+                inputs=("scenes",),
+                outputs=("storyboard_prompts", "storyboard_images"),
+                error_key="error_storyboard",
+            ),
+            Stage(
+                name="social_optimizer",
+                run=self._social_optimizer.call,
+                inputs=("script", "expanded_idea"),
+                outputs=("social_output",),
+                error_key="error_social_optimizer",
+            ),
+        ]
+
+        # Thumbnails, WebP variants and the contact sheet, on the process pool
+        if self._postprocessor is not None:
+            stages.append(
+                Stage(
+                    name="postprocess",
+                    run=self._postprocessor.call,
+                    inputs=("storyboard_images",),
+                    outputs=("storyboard_assets",),
+                    error_key="error_postprocess",
+                    # The assets are extras; the story is complete without them
+                    fatal=False,
+                )
+            )
+
+        # The storyboard PDF, one page per shot
+        if self._exporter is not None:
+            stages.append(
+                Stage(
+                    name="export",
+                    run=self._exporter.call,
+                    inputs=("script", "scenes", "storyboard_images"),
+                    outputs=("storyboard_pdf",),
+                    error_key="error_export",
+                    # An optional add-on, like the post-processed assets
+                    fatal=False,
+                )
+            )
+
+        return StageGraph(stages)
+
+    def _create_final_package(self, state: StoryState) -> StoryState:
+        """
+        Gathers all data from the state into the 'final_package' field.
+        """
+        state.final_package = {
+            "run_id": state.run_id,
+            "idea": state.idea,
+            "expanded_idea": state.expanded_idea,
+            "script": state.script,
+            "scenes_list": state.scenes,
+            "storyboard_prompts": state.storyboard_prompts,
+            "storyboard_images": state.storyboard_images,
+            "storyboard_assets": state.storyboard_assets,
+            "storyboard_pdf": state.storyboard_pdf,
+            "social_media_guide": state.social_output,
+            "metadata": state.metadata,
+        }
+        return state
+
+
+# --- Shared Coordinator ---
+# Building a coordinator creates every agent's Gemini model and tool clients,
+# so one instance is created per process and shared by all requests. The
+# coordinator keeps no per-run state, so concurrent calls are safe.
+_coordinator: Optional[StoryCrafterCoordinator] = None
+_coordinator_lock = threading.Lock()
+
+
+def get_coordinator() -> StoryCrafterCoordinator:
+    """
+    Returns the process-wide coordinator, creating it on first use.
+    """
+    global _coordinator
+    if _coordinator is None:
+        with _coordinator_lock:
+            if _coordinator is None:
+                _coordinator = StoryCrafterCoordinator()
+    return _coordinator
+
+
+# -- Main execution block ---
+
+
+def run_idea(
+    idea: str,
+    user_id: str = DEFAULT_USER_ID,
+    on_event: Optional[EventCallback] = None,
+    profile: bool = False,
+) -> StoryState:
+    """
+    Runs a new pipeline for `idea`, guided by `user_id`'s saved preferences,
+    and returns the final state.
+    """
+
+    # 1. Load this creator's preferences
+    prefs = preferences_memory.load(user_id)
+
+    # 2. Create the initial state
+    initial_state = StoryState(idea=idea, preferences=prefs)
+
+    # 3. Get session memory (from ADK)
+    session_memory = get_session_memory()
+
+    # 4. Get the shared Coordinator
+    coordinator = get_coordinator()
+
+    # 5. Run the coordinator
+    # We pass the coordinator, the initial state, and the memory
+    return coordinator.call(initial_state, on_event=on_event, profile=profile)
+
+
+def run_pipeline(idea: str, user_id: str = DEFAULT_USER_ID, profile: bool = False) -> dict:
+    """
+    A helper function to run the full pipeline.
+    """
+    # Return the final, packaged result
+    return run_idea(idea, user_id, profile=profile).final_package
+
+
+def resume_pipeline(
+    run_id: str, on_event: Optional[EventCallback] = None, profile: bool = False
+) -> StoryState:
+    """
+    Restarts a run from its last checkpoint, skipping the stages that
+    already finished. Raises KeyError if the run has no checkpoint, and
+    RunConflictError if it already succeeded or is still running.
+    """
+    checkpoint = get_checkpoint_store().load(run_id)
+    if checkpoint is None:
+        raise KeyError(f"No checkpoint found for run {run_id}")
+
+    state, completed_stages = checkpoint
+    if state.final_package is not None:
+        raise RunConflictError(f"Run {run_id} already succeeded")
+    logger.info(f"Resuming run {run_id}. Completed stages: {completed_stages}")
+    return get_coordinator().call(
+        state, on_event=on_event, completed_stages=completed_stages, profile=profile
+    )
+
+
+def run_batch_item(item: Dict[str, Any], resume_run_id: Optional[str] = None) -> dict:
+    """
+    Runs one idea of a batch. If an earlier attempt failed, it is resumed
+    from its checkpoint instead of starting over.
+    """
+    if resume_run_id:
+        try:
+            return package_or_raise(resume_pipeline(resume_run_id))
+        except KeyError:
+            logger.info(f"No checkpoint for run {resume_run_id}; starting over.")
+
+    return package_or_raise(run_idea(item["idea"], item["user_id"]))
+
+
+def run_batch(
+    items: List[Dict[str, Any]],
+    output_path: str,
+    concurrency: Optional[int] = None,
+    run_item: BatchItemFn = run_batch_item,
+) -> dict:
+    """
+    Runs many ideas on the shared coordinator, so every run reuses the same
+    agents, clients and caches. Results are appended to `output_path` as
+    they finish; running the same batch again skips ideas that succeeded.
+    Each idea is run with `run_item`.
+    """
+    runner = BatchRunner(
+        run_item,
+        output_path,
+        concurrency=concurrency or batch_concurrency(),
+    )
+    return runner.run(items)
+
@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from state.story_state import StoryState
+from utils.config import load_config
+from utils.logger import get_logger
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+
+class CheckpointStore:
+    """
+    Durable StoryState snapshots, one JSON file per run ID.
+
+    Each snapshot records which stages had finished when it was taken, so a
+    failed run can restart from the first stage that did not finish.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, run_id: str) -> str:
+        return os.path.join(self.directory, f"{run_id}.json")
+
+    def save(self, state: StoryState, completed_stages: Iterable[str]):
+        checkpoint = {
+            "run_id": state.run_id,
+            "saved_at": time.time(),
+            "completed_stages": sorted(completed_stages),
+            "state": state.to_dict(),
+        }
+        path = self._path(state.run_id)
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w") as f:
+                json.dump(checkpoint, f, default=str)
+            os.replace(tmp_path, path)
+
+    def load(self, run_id: str) -> Optional[Tuple[StoryState, List[str]]]:
+        """
+        Returns (state, completed_stages) for `run_id`, or None if there is
+        no checkpoint.
+        """
+        # Run IDs come from clients, so never let one escape the directory
+        if os.path.basename(run_id) != run_id:
+            return None
+
+        try:
+            with open(self._path(run_id), "r") as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return None
+
+        state = StoryState.from_dict(checkpoint["state"])
+        return state, checkpoint["completed_stages"]
+
+
+# --- Process-wide Checkpoint Store ---
+_checkpoint_store: Optional[CheckpointStore] = None
+_checkpoint_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """
+    Returns the shared checkpoint store, rooted at the configured checkpoints path.
+    """
+    global _checkpoint_store
+    with _checkpoint_store_lock:
+        if _checkpoint_store is None:
+            paths = load_config().get("paths", {})
+            _checkpoint_store = CheckpointStore(
+                paths.get("checkpoints", "outputs/checkpoints")
+            )
+        return _checkpoint_store
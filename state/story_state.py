@@ -1,5 +1,9 @@
-from dataclasses import dataclass, field
-from typing import Dict, List, Any, Optional
+import copy
+import uuid
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Any, Optional, Union
+
+from utils.metrics import metadata_lock
 
 
 @dataclass
@@ -12,6 +16,9 @@ class StoryState:
     # Initial user input
     idea: Optional[str] = None
 
+    # Unique ID of this pipeline run
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
     # Agent 1 output: Expanded idea
     expanded_idea: Optional[Dict[str, Any]] = None
 
@@ -25,6 +32,10 @@ class StoryState:
     storyboard_prompts: Optional[List[Dict[str, Any]]] = None
     storyboard_images: Optional[List[str]] = None  # local image file path
 
+    # Storyboard post-processing: thumbnails, WebP variants, contact sheet
+    storyboard_assets: Optional[Dict[str, Any]] = None
+    storyboard_pdf: Optional[Union[str, Dict[str, Any]]] = None  # PDF path, or {"error": ...}
+
     # Agent 5 output: captions, hashtags, posting schedule
     social_output: Optional[Dict[str, Any]] = None
 
@@ -36,3 +47,24 @@ class StoryState:
 
     # Internal metadata for debugging/evaluation
     metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        A JSON-ready snapshot of the state. Fields are deep-copied while
+        holding the metadata lock, since concurrent stages and hedged calls
+        may still be writing into the nested metadata dicts.
+        """
+        for attempt in range(3):
+            try:
+                with metadata_lock:
+                    return {f.name: copy.deepcopy(getattr(self, f.name)) for f in fields(self)}
+            except RuntimeError:
+                # An agent set a top-level key (e.g. its error key) without
+                # the lock mid-copy; take the snapshot again
+                if attempt == 2:
+                    raise
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StoryState":
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
@@ -1,5 +1,29 @@
-from tools.image_generation_tool import ImageGenerationTool
-from tools.prompt_refiner_tool import PromptRefinerTool
-from tools.hashtag_tool import HashtagTool
+import importlib
 
-TOOLS = [ImageGenerationTool(), PromptRefinerTool(), HashtagTool()]
+# Tools are imported and built on first access, so importing this package
+# does not load the ADK, the Gemini SDK or the Tavily client.
+_TOOL_MODULES = {
+    "ImageGenerationTool": "tools.image_generation_tool",
+    "PromptRefinerTool": "tools.prompt_refiner_tool",
+    "HashtagTool": "tools.hashtag_tool",
+}
+
+_tools = None
+
+
+def get_tools():
+    """
+    Returns one instance of every tool, built on the first call.
+    """
+    global _tools
+    if _tools is None:
+        _tools = [__getattr__(name)() for name in _TOOL_MODULES]
+    return _tools
+
+
+def __getattr__(name):
+    if name == "TOOLS":
+        return get_tools()
+    if name in _TOOL_MODULES:
+        return getattr(importlib.import_module(_TOOL_MODULES[name]), name)
+    raise AttributeError(f"module 'tools' has no attribute '{name}'")
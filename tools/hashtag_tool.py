@@ -1,30 +1,59 @@
 import re
+import threading
 from google.adk.tools import FunctionTool
-from tavily import TavilyClient
 from pydantic import PrivateAttr
-from typing import Optional
+from typing import Any, Callable, Optional
 
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breaker
 from utils.env import load_env
 from utils.logger import get_logger
+from utils.metrics import track_call
 
 # --- Config & Logging ---
 logger = get_logger(__name__)
 env = load_env()
 
+# Optional stand-in for TavilyClient, called as factory(api_key).
+# Used by the offline benchmarks; None means the real Tavily client.
+_search_client_factory: Optional[Callable[[str], Any]] = None
+
+
+def set_search_client_factory(factory: Optional[Callable[[str], Any]]):
+    """
+    Builds the search client with `factory` instead of TavilyClient.
+    """
+    global _search_client_factory
+    _search_client_factory = factory
+
 
 class HashtagTool(FunctionTool):
-    _search_tool: Optional[TavilyClient] = PrivateAttr()
+    _search_tool: Optional[Any] = PrivateAttr()
+    _search_tool_lock: threading.Lock = PrivateAttr()
     _api_key: Optional[str] = PrivateAttr()
+    _breaker: CircuitBreaker = PrivateAttr()
 
     def __init__(self):
         super().__init__(func=self.call)
         self._api_key = env.get("TAVILY_API_KEY")
+        # The Tavily client is created on the first search
+        self._search_tool = None
+        self._search_tool_lock = threading.Lock()
+        # While Tavily is down, searches fail fast to the dummy hashtags
+        self._breaker = get_circuit_breaker("tavily")
 
         if not self._api_key:
             logger.error("TAVILY_API_KEY missing. Hashtag tool will fail.")
-            self._search_tool = None
-        else:
-            self._search_tool = TavilyClient(api_key=self._api_key)
+
+    def _get_search_tool(self):
+        with self._search_tool_lock:
+            if self._search_tool is None:
+                if _search_client_factory is not None:
+                    self._search_tool = _search_client_factory(self._api_key)
+                else:
+                    from tavily import TavilyClient
+
+                    self._search_tool = TavilyClient(api_key=self._api_key)
+            return self._search_tool
 
     def name(self):
         return "hashtags"
@@ -46,8 +75,12 @@ class HashtagTool(FunctionTool):
             "required": ["hashtags"],
         }
 
-    def call(self, input):
-        if not self._search_tool:
+    def call(self, input, metadata=None):
+        """
+        Searches for hashtags on `input["topic"]`. The search latency is
+        added to `metadata` if given.
+        """
+        if not self._api_key:
             return {"hashtags": ["#error", "#config_missing"]}
 
         topic = input["topic"]
@@ -56,7 +89,8 @@ class HashtagTool(FunctionTool):
 
         try:
             # 1. Call the Tavily Search tool
-            search_results = self._search_tool.search(query=query)
+            with self._breaker.protect(), track_call("tavily", "search", metadata):
+                search_results = self._get_search_tool().search(query=query)
 
             # 2. Extract text from snippets
             text_blob = " ".join(
@@ -82,7 +116,10 @@ class HashtagTool(FunctionTool):
             return {"hashtags": final_list}
 
         except Exception as e:
-            logger.error(f"Hashtag tool failed: {e}")
+            if isinstance(e, CircuitOpenError):
+                logger.warning(f"Skipping hashtag search: {e}")
+            else:
+                logger.error(f"Hashtag tool failed: {e}")
             # Fallback to the original dummy implementation
             t = topic.replace(" ", "")
             return {"hashtags": [f"#{t}", "#ai", "#shorts"]}
@@ -1,11 +1,21 @@
 import requests
 import os
+import threading
 from google.adk.tools import FunctionTool
 
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breaker
+from utils.config import load_config
 from utils.env import load_env
+from utils.http_client import (
+    get_download_chunk_size,
+    get_http_session,
+    get_http_timeout,
+)
+from utils.image_store import ImageStore, get_image_store
 from utils.logger import get_logger
+from utils.metrics import track_call
 
-from typing import Optional
+from typing import Optional, Tuple
 from pydantic import PrivateAttr
 
 
@@ -13,16 +23,38 @@ from pydantic import PrivateAttr
 logger = get_logger(__name__)
 env = load_env()
 
+DEFAULT_API_URL = "https://api.stablecog.com/v1/image/generation/create"
+
 
 class ImageGenerationTool(FunctionTool):
 
     _api_key: Optional[str] = PrivateAttr()
     _api_url: str = PrivateAttr()
+    _session: requests.Session = PrivateAttr()
+    _timeout: Tuple[float, float] = PrivateAttr()
+    _chunk_size: int = PrivateAttr()
+    _store: ImageStore = PrivateAttr()
+    _width: int = PrivateAttr()
+    _height: int = PrivateAttr()
+    _model_id: Optional[str] = PrivateAttr()
+    _breaker: CircuitBreaker = PrivateAttr()
 
     def __init__(self):
         super().__init__(func=self.call)
         self._api_key = env.get("STABLECOG_API_KEY")
-        self._api_url = "https://api.stablecog.com/v1/image/generation/create"
+        # Shared keep-alive connections, bounded waits, chunked downloads
+        self._session = get_http_session()
+        self._timeout = get_http_timeout()
+        self._chunk_size = get_download_chunk_size()
+        # Images are stored by content hash and reused across runs
+        self._store = get_image_store()
+        image_config = load_config().get("image_generation", {})
+        self._api_url = image_config.get("api_url", DEFAULT_API_URL)
+        self._width = image_config.get("width", 1024)
+        self._height = image_config.get("height", 1024)
+        self._model_id = image_config.get("model_id")
+        # While Stablecog is down, scenes fail fast to the ERROR_SCENE_* fallback
+        self._breaker = get_circuit_breaker("stablecog")
         if not self._api_key:
             logger.error("STABLECOG_API_KEY not found. Image generation will fail.")
 
@@ -32,16 +64,29 @@ class ImageGenerationTool(FunctionTool):
     def description(self):
         return "Generate an image from a prompt and save it locally."
 
-    def call(self, input):
-        if not self._api_key:
-            return {"image_path": "ERROR_API_KEY_MISSING"}
-
+    def call(self, input, metadata=None):
+        """
+        Generates (or reuses) the image for one scene. Call latencies are
+        added to `metadata` if given.
+        """
         prompt = input["prompt"]
         scene_id = input["scene_id"]
+        run_id = input.get("run_id", "unassigned")
+
+        # An identical request was already generated: reuse the stored file
+        key = ImageStore.make_key(prompt, self._width, self._height, self._model_id)
+        stored_path = self._store.get(key)
+        if stored_path:
+            logger.info(f"Reusing stored image for scene {scene_id}: {stored_path}")
+            self._store.record(run_id, scene_id, key, reused=True)
+            return {"image_path": stored_path}
+
+        if not self._api_key:
+            return {"image_path": "ERROR_API_KEY_MISSING"}
 
         # Define the local save path (the pipeline expects this)
         # The API response URL ends in .jpeg, so we use that
-        local_image_path = f"outputs/images/scene_{scene_id}.jpeg"
+        local_image_path = self._store.path_for(key)
 
         headers = {
             "Authorization": f"Bearer {self._api_key}",
@@ -51,34 +96,59 @@ class ImageGenerationTool(FunctionTool):
         body = {
             "prompt": prompt,
             "num_outputs": 1,
-            "width": 1024,
-            "height": 1024,
+            "width": self._width,
+            "height": self._height,
         }
+        if self._model_id:
+            body["model_id"] = self._model_id
 
         logger.info(f"Calling Stablecog API for scene {scene_id}...")
 
         try:
-            # 1. Make the API call to generate the image
-            response = requests.post(self._api_url, headers=headers, json=body)
-            response.raise_for_status()  # Raise an error for bad responses
-
-            data = response.json()
-            image_url = data["outputs"][0]["url"]
-
-            logger.info(f"API success. Downloading image from: {image_url}")
-
-            # 2. Download the image from the returned URL
-            image_data = requests.get(image_url).content
-
-            # 3. Save the image to the local path
-            with open(local_image_path, "wb") as f:
-                f.write(image_data)
+            with self._breaker.protect():
+                # 1. Make the API call to generate the image
+                with track_call("stablecog", "generate", metadata):
+                    response = self._session.post(
+                        self._api_url, headers=headers, json=body, timeout=self._timeout
+                    )
+                    response.raise_for_status()  # Raise an error for bad responses
+                    data = response.json()
+
+                image_url = data["outputs"][0]["url"]
+
+                logger.info(f"API success. Downloading image from: {image_url}")
+
+                # 2. Stream the image from the returned URL to disk in chunks,
+                #    so only one chunk is held in memory at a time
+                with track_call("stablecog", "download", metadata):
+                    self._download(image_url, local_image_path)
+            self._store.added(key)
+            self._store.record(run_id, scene_id, key, reused=False)
 
             logger.info(f"Image saved locally to: {local_image_path}")
 
-            # 4. Return the local path, as expected by the pipeline
+            # 3. Return the local path, as expected by the pipeline
             return {"image_path": local_image_path}
 
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping image for scene {scene_id}: {e}")
+            return {"image_path": f"ERROR_SCENE_{scene_id}"}
+
         except Exception as e:
             logger.error(f"Image generation failed for scene {scene_id}: {e}")
             return {"image_path": f"ERROR_SCENE_{scene_id}"}
+
+    def _download(self, url: str, local_path: str):
+        # Write to a temporary file first so a failed download never leaves
+        # a truncated image at the final path
+        tmp_path = f"{local_path}.{threading.get_ident()}.part"
+        try:
+            with self._session.get(url, stream=True, timeout=self._timeout) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=self._chunk_size):
+                        f.write(chunk)
+            os.replace(tmp_path, local_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
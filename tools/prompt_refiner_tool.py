@@ -1,14 +1,11 @@
-import google.generativeai as genai
+import json
+from concurrent.futures import ThreadPoolExecutor
 from google.adk.tools import FunctionTool
-from utils.config import load_config
-from utils.env import load_env
+from utils.llm import GeminiModel, record_count
 from utils.logger import get_logger
-from typing import Optional
+from typing import List, Optional
 
 # --- Configuration & Logging ---
-load_env()
-config = load_config()
-genai.configure(api_key=config["api_keys"]["google_api_key"])
 logger = get_logger(__name__)
 
 # --- System Prompts ---
@@ -29,22 +26,43 @@ Example Input: "Wide Shot. A man walks on a rainy street."
 Example Output: "Cinematic wide shot, a man in a black trench coat walks down a lonely, rain-slicked street, neon-lit reflections in the puddles, moody atmosphere, film noir style, 8K, hyperrealistic."
 """
 
+# Batch mode: refine every scene of a storyboard in one request
+BATCH_SYSTEM_PROMPT = f"""
+{SYSTEM_PROMPT}
+You will receive a JSON object with a "scenes" list. Each item has an
+"index" and a "scene_text". Refine every scene_text on its own, exactly as
+you would for a single scene.
+
+You MUST output a JSON object with a single key: "prompts".
+The value of "prompts" must be a list of strings, one refined prompt per
+input scene, in the same order as the input.
+"""
+
 
 # --- Tool Definition ---
 class PromptRefinerTool(FunctionTool):
-    _llm: Optional[genai.GenerativeModel]
+    _llm: Optional[GeminiModel]
+    _batch_llm: Optional[GeminiModel]
 
     def __init__(self):
         super().__init__(func=self.call)
         # We create a *new* LLM instance just for this tool
         try:
-            self._llm = genai.GenerativeModel(
-                model_name=config["models"].get("prompt_refiner", "gemini-1.5-flash"),
+            self._llm = GeminiModel(
+                model_key="prompt_refiner",
+                default_model="gemini-1.5-flash",
                 system_instruction=SYSTEM_PROMPT,
             )
+            self._batch_llm = GeminiModel(
+                model_key="prompt_refiner",
+                default_model="gemini-1.5-flash",
+                system_instruction=BATCH_SYSTEM_PROMPT,
+                generation_config={"response_mime_type": "application/json"},
+            )
         except Exception as e:
             logger.error(f"Failed to initialize PromptRefiner LLM: {e}")
             self._llm = None
+            self._batch_llm = None
 
     def name(self):
         return "prompt_refiner"
@@ -66,7 +84,7 @@ class PromptRefinerTool(FunctionTool):
             "required": ["prompt"],
         }
 
-    def call(self, input):
+    def call(self, input, metadata: Optional[dict] = None):
         scene_text = input["scene_text"]
 
         if not self._llm:
@@ -76,7 +94,7 @@ class PromptRefinerTool(FunctionTool):
         try:
             logger.info(f"Refining prompt for: '{scene_text}'")
             # This is an LLM call *inside* your tool
-            response = self._llm.generate_content(scene_text)
+            response = self._llm.generate_content(scene_text, metadata=metadata)
 
             refined_prompt = response.text.strip()
 
@@ -86,3 +104,53 @@ class PromptRefinerTool(FunctionTool):
         except Exception as e:
             logger.error(f"Error during prompt refinement: {e}")
             return {"prompt": scene_text}
+
+    def call_batch(
+        self, scene_texts: List[str], metadata: Optional[dict] = None
+    ) -> List[str]:
+        """
+        Refines all scene texts in one LLM call and returns the prompts in
+        input order. Falls back to one call per scene if the batch response
+        is malformed.
+        """
+        if not scene_texts:
+            return []
+
+        if not self._batch_llm:
+            return self._call_each(scene_texts, metadata)
+
+        try:
+            logger.info(f"Refining {len(scene_texts)} prompts in one batch...")
+            batch_input = json.dumps(
+                {
+                    "scenes": [
+                        {"index": index, "scene_text": text}
+                        for index, text in enumerate(scene_texts)
+                    ]
+                }
+            )
+            response = self._batch_llm.generate_content(batch_input, metadata=metadata)
+            prompts = json.loads(response.text)["prompts"]
+
+            if len(prompts) != len(scene_texts):
+                raise ValueError(
+                    f"Expected {len(scene_texts)} prompts, got {len(prompts)}"
+                )
+            if not all(isinstance(p, str) and p.strip() for p in prompts):
+                raise ValueError("Batch response contains empty or non-string prompts")
+
+            logger.info(f"Batch refinement complete for {len(prompts)} scenes.")
+            return [p.strip() for p in prompts]
+
+        except Exception as e:
+            logger.warning(f"Batch prompt refinement failed, refining per scene: {e}")
+            record_count(metadata, "prompt_refiner_batch_fallbacks")
+            return self._call_each(scene_texts, metadata)
+
+    def _call_each(self, scene_texts: List[str], metadata: Optional[dict]) -> List[str]:
+        with ThreadPoolExecutor(max_workers=len(scene_texts)) as executor:
+            outputs = executor.map(
+                lambda text: self.call({"scene_text": text}, metadata=metadata),
+                scene_texts,
+            )
+            return [output["prompt"] for output in outputs]
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils.config import load_config
+from utils.logger import get_logger
+from utils.stage_graph import PipelineError
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+# Runs one batch item: (item, run ID of an earlier failed attempt or None)
+BatchItemFn = Callable[[Dict[str, Any], Optional[str]], Dict[str, Any]]
+
+
+def make_item(idea: str, user_id: str, item_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Normalizes one batch entry. Without an explicit ID, the ID is a hash of
+    the idea and user, so re-reading the same input resumes cleanly.
+    """
+    if not item_id:
+        digest = hashlib.sha256(f"{user_id}\n{idea}".encode("utf-8")).hexdigest()
+        item_id = digest[:16]
+    return {"id": str(item_id), "idea": idea, "user_id": user_id}
+
+
+def read_ideas(path: str, default_user_id: str) -> List[Dict[str, Any]]:
+    """
+    Reads a JSONL file of ideas. Each line is either a JSON string or an
+    object with "idea" and optional "id" and "user_id". Blank lines are skipped.
+    """
+    items = []
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if isinstance(entry, str):
+                entry = {"idea": entry}
+            if not entry.get("idea"):
+                raise ValueError(f"{path}:{line_number} has no 'idea'")
+            items.append(
+                make_item(entry["idea"], entry.get("user_id", default_user_id), entry.get("id"))
+            )
+    return items
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads a batch output file into {item ID: latest record}.
+    Returns {} if the batch has not written anything yet.
+    """
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interruption
+                continue
+            results[record["id"]] = record
+    return results
+
+
+class BatchRunner:
+    """
+    Runs many ideas with bounded concurrency, appending one JSON line per
+    finished item to `output_path` as soon as it finishes.
+
+    The output file doubles as the resume log: items whose latest line
+    succeeded are skipped on the next run, and items that failed are retried,
+    resuming from their checkpoint when one exists.
+    """
+
+    def __init__(self, run_item: BatchItemFn, output_path: str, concurrency: int = 4):
+        self.run_item = run_item
+        self.output_path = output_path
+        self.concurrency = max(1, concurrency)
+        self._write_lock = threading.Lock()
+
+    def _write(self, record: Dict[str, Any]):
+        with self._write_lock:
+            with open(self.output_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+
+    def _run_one(self, item: Dict[str, Any], resume_run_id: Optional[str]) -> Dict[str, Any]:
+        record = {"id": item["id"], "idea": item["idea"], "user_id": item["user_id"]}
+        start = time.perf_counter()
+        try:
+            final_package = self.run_item(item, resume_run_id)
+            record.update(
+                status="succeeded",
+                run_id=final_package.get("run_id"),
+                result=final_package,
+            )
+        except PipelineError as e:
+            record.update(status="failed", run_id=e.run_id, error=e.detail)
+        except Exception as e:
+            record.update(status="failed", run_id=resume_run_id, error=str(e))
+        record["duration_sec"] = round(time.perf_counter() - start, 3)
+        return record
+
+    def run(self, items: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Runs every item that has not already succeeded and returns a summary.
+        """
+        # Duplicate ideas share an ID; run each once
+        unique: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            unique.setdefault(item["id"], item)
+        items = list(unique.values())
+        output_dir = os.path.dirname(self.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        # Create the file up front so the batch is visible before any item finishes
+        open(self.output_path, "a").close()
+
+        previous = load_results(self.output_path)
+        todo = [i for i in items if previous.get(i["id"], {}).get("status") != "succeeded"]
+        skipped = len(items) - len(todo)
+        logger.info(
+            f"Batch: {len(items)} ideas, {skipped} already done, {len(todo)} to run "
+            f"with concurrency {self.concurrency}."
+        )
+
+        succeeded = failed = 0
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="batch"
+        ) as executor:
+            futures = [
+                executor.submit(self._run_one, item, previous.get(item["id"], {}).get("run_id"))
+                for item in todo
+            ]
+            for future in as_completed(futures):
+                record = future.result()
+                self._write(record)
+                if record["status"] == "succeeded":
+                    succeeded += 1
+                else:
+                    failed += 1
+                logger.info(
+                    f"Batch progress: {succeeded + failed}/{len(todo)} "
+                    f"({failed} failed). Last: {record['id']} {record['status']}."
+                )
+
+        return {
+            "output_path": self.output_path,
+            "total": len(items),
+            "skipped": skipped,
+            "succeeded": succeeded,
+            "failed": failed,
+        }
+
+
+def batch_concurrency(requested: Optional[int] = None) -> int:
+    """
+    Returns the number of ideas to run at once: `requested` if given, capped
+    at batch.max_concurrency, otherwise batch.concurrency.
+    """
+    batch_config = load_config().get("batch", {})
+    if requested is None:
+        return batch_config.get("concurrency", 4)
+    return max(1, min(requested, batch_config.get("max_concurrency", 8)))
+
+
+def batch_output_path(batch_id: str) -> str:
+    """
+    Returns where the results of batch `batch_id` are written.
+    """
+    output_dir = load_config().get("batch", {}).get("output_dir", "outputs/batches")
+    return os.path.join(output_dir, f"{os.path.basename(batch_id)}.jsonl")
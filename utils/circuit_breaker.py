@@ -0,0 +1,178 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+from utils.config import load_config
+from utils.logger import get_logger
+from utils.metrics import CIRCUIT_BREAKER_REJECTIONS, CIRCUIT_BREAKER_STATE
+from utils.retry import is_retryable
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Exported as the value of the state gauge
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling a service whose circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops calling an external service that keeps failing.
+
+    Closed: calls go through. After `failure_threshold` failures in a row
+    the breaker opens, and every call fails at once with CircuitOpenError
+    so callers fall back immediately instead of waiting out timeouts. After
+    `recovery_timeout_sec` it is half-open: up to `half_open_max_calls`
+    trial calls go through. A success closes the breaker; a failure opens
+    it again.
+
+    Only errors that say the service is unhealthy count as failures (by
+    default the ones that are retried: network errors, timeouts, 429 and
+    5xx). Any other outcome means the service answered.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout_sec: float = 30,
+        half_open_max_calls: int = 1,
+        is_failure: Callable[[BaseException], bool] = is_retryable,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout_sec = recovery_timeout_sec
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.is_failure = is_failure
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self._lock = threading.Lock()
+        CIRCUIT_BREAKER_STATE.set(STATE_VALUES[CLOSED], breaker=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    @contextmanager
+    def protect(self) -> Iterator[None]:
+        """
+        Runs the enclosed call if the breaker allows it, and records how it
+        went. Raises CircuitOpenError without running it otherwise.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == OPEN or (
+                state == HALF_OPEN and self._trial_calls >= self.half_open_max_calls
+            ):
+                CIRCUIT_BREAKER_REJECTIONS.inc(breaker=self.name)
+                retry_in = self._opened_at + self.recovery_timeout_sec - time.monotonic()
+                raise CircuitOpenError(
+                    f"Circuit '{self.name}' is open; retrying in {max(retry_in, 0):.0f}s"
+                )
+            trial = state == HALF_OPEN
+            if trial:
+                self._trial_calls += 1
+
+        try:
+            yield
+        except BaseException as e:
+            self._record(trial, failed=self.is_failure(e))
+            raise
+        else:
+            self._record(trial, failed=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            snapshot = {"state": state, "consecutive_failures": self._failures}
+            if state != CLOSED:
+                snapshot["opened_sec_ago"] = round(time.monotonic() - self._opened_at, 1)
+            return snapshot
+
+    def _current_state(self) -> str:
+        # Called with the lock held
+        if (
+            self._state == OPEN
+            and time.monotonic() - self._opened_at >= self.recovery_timeout_sec
+        ):
+            self._transition(HALF_OPEN)
+            self._trial_calls = 0
+        return self._state
+
+    def _record(self, trial: bool, failed: bool):
+        with self._lock:
+            if trial:
+                self._trial_calls -= 1
+
+            if not failed:
+                self._failures = 0
+                if self._state != CLOSED:
+                    self._transition(CLOSED)
+                return
+
+            self._failures += 1
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def _transition(self, state: str):
+        # Called with the lock held
+        if state == self._state:
+            return
+        log = logger.warning if state == OPEN else logger.info
+        log(f"Circuit '{self.name}': {self._state} -> {state}")
+        self._state = state
+        CIRCUIT_BREAKER_STATE.set(STATE_VALUES[state], breaker=self.name)
+
+
+# --- Process-wide Breakers ---
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """
+    Returns the shared breaker for `name` (e.g. "stablecog", "tavily" or
+    "gemini:<model>"), built from the "circuit_breakers" config section.
+    A sub-section named after the service (the part before any ":")
+    overrides the defaults for it.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker_config = dict(load_config().get("circuit_breakers", {}))
+            service_config = breaker_config.pop(name.split(":")[0], None)
+            if isinstance(service_config, dict):
+                breaker_config.update(service_config)
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=breaker_config.get("failure_threshold", 5),
+                recovery_timeout_sec=breaker_config.get("recovery_timeout_sec", 30),
+                half_open_max_calls=breaker_config.get("half_open_max_calls", 1),
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def circuit_breaker_states() -> Dict[str, Dict[str, Any]]:
+    """
+    Returns a snapshot of every breaker created so far, by name.
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
@@ -1,7 +1,147 @@
 import yaml
 import os
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional
 
-def load_config():
-    config_path = os.path.join("configs", "settings.yaml")
-    with open(config_path, "r") as f:
-        return yaml.safe_load(f)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CONFIG_PATH = os.path.join("configs", "settings.yaml")
+
+# Sections every deployment must define, and the models the agents need
+REQUIRED_SECTIONS = ("api_keys", "models", "paths", "memory")
+REQUIRED_MODELS = ("idea_expansion", "script_writer", "scene_breakdown", "social_optimizer")
+
+
+class ConfigError(ValueError):
+    """
+    Raised when configs/settings.yaml is missing required settings.
+    """
+
+
+class Settings(dict):
+    """
+    The validated contents of configs/settings.yaml.
+
+    Still a dict, so existing config["section"]["key"] lookups keep working,
+    with typed accessors for the sections every module reads.
+    """
+
+    @property
+    def api_keys(self) -> Dict[str, str]:
+        return self["api_keys"]
+
+    @property
+    def models(self) -> Dict[str, str]:
+        return self["models"]
+
+    @property
+    def paths(self) -> Dict[str, str]:
+        return self["paths"]
+
+    @property
+    def memory(self) -> Dict[str, Any]:
+        return self["memory"]
+
+
+def _validate(raw: Any) -> Settings:
+    if not isinstance(raw, dict):
+        raise ConfigError(f"{CONFIG_PATH} must contain a mapping")
+
+    for section in REQUIRED_SECTIONS:
+        if not isinstance(raw.get(section), dict):
+            raise ConfigError(f"{CONFIG_PATH} is missing the '{section}' section")
+
+    missing_models = [key for key in REQUIRED_MODELS if not raw["models"].get(key)]
+    if missing_models:
+        raise ConfigError(f"{CONFIG_PATH} is missing models: {', '.join(missing_models)}")
+
+    for key, path in raw["paths"].items():
+        if not isinstance(path, str):
+            raise ConfigError(f"paths.{key} must be a string")
+
+    return Settings(raw)
+
+
+# --- Memoized Loading ---
+_settings: Optional[Settings] = None
+_settings_mtime: Optional[int] = None
+_settings_lock = threading.Lock()
+_reload_hooks: List[Callable[[], Optional[Callable[[Settings], None]]]] = []
+
+
+def register_reload_hook(hook: Callable[[Settings], None]):
+    """
+    Calls `hook(settings)` whenever settings.yaml changes and is reloaded.
+    Bound methods are held weakly, so registering one does not keep its
+    object alive.
+    """
+    if hasattr(hook, "__self__"):
+        ref = weakref.WeakMethod(hook)
+    else:
+        ref = lambda: hook
+    with _settings_lock:
+        _reload_hooks.append(ref)
+
+
+def load_config() -> Settings:
+    """
+    Returns the settings, re-reading the YAML file only when its mtime changes.
+
+    If a changed file is invalid, or the file is briefly missing (editors
+    and config mounts often replace it by rename), the last good settings
+    are kept.
+    """
+    global _settings, _settings_mtime
+
+    try:
+        mtime = os.stat(CONFIG_PATH).st_mtime_ns
+    except OSError as e:
+        with _settings_lock:
+            if _settings is None:
+                raise
+            # Logged once; the file is re-read as soon as it is back
+            if _settings_mtime is not None:
+                logger.warning(f"Cannot read {CONFIG_PATH} ({e}); keeping the last good settings")
+                _settings_mtime = None
+            return _settings
+
+    reloaded = None
+
+    with _settings_lock:
+        if _settings is None or mtime != _settings_mtime:
+            try:
+                with open(CONFIG_PATH, "r") as f:
+                    settings = _validate(yaml.safe_load(f))
+            except (ConfigError, yaml.YAMLError, OSError) as e:
+                if _settings is None:
+                    raise
+                # Keep serving the last good config until the file is fixed
+                logger.error(f"Ignoring invalid config change: {e}")
+                _settings_mtime = mtime
+                return _settings
+
+            if _settings is not None:
+                reloaded = settings
+            _settings = settings
+            _settings_mtime = mtime
+
+            _reload_hooks[:] = [ref for ref in _reload_hooks if ref() is not None]
+            hooks = [ref() for ref in _reload_hooks]
+
+        settings = _settings
+
+    if reloaded is not None:
+        logger.info(f"Reloaded {CONFIG_PATH}")
+        for hook in hooks:
+            if hook is None:
+                continue
+            # One failing hook must not stop the others or the caller
+            try:
+                hook(reloaded)
+            except Exception:
+                logger.exception(f"Config reload hook {hook!r} failed")
+
+    return settings
@@ -9,6 +9,7 @@ def load_env():
         "FLUX_API_KEY": os.getenv("FLUX_API_KEY"),
         "APP_ENV": os.getenv("APP_ENV", "development"),
         "LOG_LEVEL": os.getenv("LOG_LEVEL", "INFO"),
+        "LOG_MODE": os.getenv("LOG_MODE"),
         "STABLECOG_API_KEY": os.getenv("STABLECOG_API_KEY"),
         "TAVILY_API_KEY": os.getenv("TAVILY_API_KEY"),
     }
@@ -0,0 +1,54 @@
+import threading
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.config import load_config
+
+# --- Process-wide HTTP Session ---
+# One Session keeps TCP+TLS connections alive per host, so repeated calls to
+# the same API skip the handshake.
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _http_config() -> dict:
+    return load_config().get("http", {})
+
+
+def get_http_session() -> requests.Session:
+    """
+    Returns the shared, connection-pooled requests Session.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            http_config = _http_config()
+            adapter = HTTPAdapter(
+                pool_connections=http_config.get("pool_connections", 10),
+                pool_maxsize=http_config.get("pool_maxsize", 32),
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def get_http_timeout() -> Tuple[float, float]:
+    """
+    Returns the (connect, read) timeout in seconds for outbound requests.
+    """
+    http_config = _http_config()
+    return (
+        http_config.get("connect_timeout_sec", 5),
+        http_config.get("read_timeout_sec", 60),
+    )
+
+
+def get_download_chunk_size() -> int:
+    """
+    Returns the chunk size in bytes used when streaming downloads to disk.
+    """
+    return _http_config().get("download_chunk_kb", 64) * 1024
@@ -0,0 +1,157 @@
+import contextvars
+import functools
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from utils.config import load_config
+from utils.logger import get_logger
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """
+    Allows `rate_per_sec` acquisitions per second on average, with bursts of
+    up to `capacity`. A rate of 0 or less disables the limit.
+    """
+
+    def __init__(self, rate_per_sec: float, capacity: float):
+        self.rate_per_sec = rate_per_sec
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate_per_sec <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated_at) * self.rate_per_sec,
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_sec = (1 - self._tokens) / self.rate_per_sec
+            time.sleep(wait_sec)
+
+
+class ImageGenerationScheduler:
+    """
+    Process-wide queue for image generation work from every pipeline.
+
+    Tasks are grouped by job and dispatched round-robin across jobs, so one
+    large storyboard cannot starve the others. Dispatch is limited by a token
+    bucket (requests per second) and by a cap on tasks in flight.
+    """
+
+    def __init__(self, rate_per_sec: float = 2, burst: int = 4, max_in_flight: int = 8):
+        self._bucket = TokenBucket(rate_per_sec, burst)
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="image-gen"
+        )
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._running = 0
+        self._condition = threading.Condition()
+        self._dispatcher = threading.Thread(
+            target=self._dispatch_loop, name="image-scheduler", daemon=True
+        )
+        self._dispatcher.start()
+
+    def submit(self, job_id: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Queues `fn(*args, **kwargs)` under `job_id` and returns its Future.
+        `fn` runs in a copy of the caller's context variables.
+        """
+        future: Future = Future()
+        fn = functools.partial(contextvars.copy_context().run, fn)
+        with self._condition:
+            self._queues.setdefault(job_id, deque()).append((future, fn, args, kwargs))
+            self._condition.notify()
+        return future
+
+    def cancel_job(self, job_id: str):
+        """
+        Cancels every task of `job_id` that has not been dispatched yet.
+        """
+        with self._condition:
+            tasks = self._queues.pop(job_id, ())
+        for future, _, _, _ in tasks:
+            future.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {
+                "queued": sum(len(tasks) for tasks in self._queues.values()),
+                "in_flight": self._running,
+                "jobs": len(self._queues),
+            }
+
+    def _next_task(self) -> tuple:
+        with self._condition:
+            while not self._queues:
+                self._condition.wait()
+
+            # Take from the job at the front, then move it to the back
+            job_id, tasks = next(iter(self._queues.items()))
+            task = tasks.popleft()
+            if tasks:
+                self._queues.move_to_end(job_id)
+            else:
+                del self._queues[job_id]
+            return task
+
+    def _dispatch_loop(self):
+        while True:
+            self._in_flight.acquire()
+            future, fn, args, kwargs = self._next_task()
+            if not future.set_running_or_notify_cancel():
+                self._in_flight.release()
+                continue
+
+            self._bucket.acquire()
+            with self._condition:
+                self._running += 1
+            self._executor.submit(self._run, future, fn, args, kwargs)
+
+    def _run(self, future: Future, fn: Callable[..., Any], args: tuple, kwargs: dict):
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._condition:
+                self._running -= 1
+            self._in_flight.release()
+
+
+# --- Process-wide Scheduler ---
+_scheduler: Optional[ImageGenerationScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_image_scheduler() -> ImageGenerationScheduler:
+    """
+    Returns the shared scheduler, built from the "image_generation" config section.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            image_config = load_config().get("image_generation", {})
+            _scheduler = ImageGenerationScheduler(
+                rate_per_sec=image_config.get("rate_per_sec", 2),
+                burst=image_config.get("burst", 4),
+                max_in_flight=image_config.get("max_in_flight", 8),
+            )
+            logger.info(f"Image generation scheduler started: {image_config or 'defaults'}")
+        return _scheduler
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from utils.config import load_config
+from utils.logger import get_logger
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+
+class ImageStore:
+    """
+    Content-addressed storage for generated images.
+
+    Each image is named by a hash of (prompt, width, height, model), so an
+    identical request reuses the stored file instead of calling the API, and
+    concurrent runs never overwrite each other. Each run gets a manifest of
+    the images it used. When the directory grows past `max_bytes`, the
+    least recently used images are evicted.
+
+    Images in the manifest of a run updated within `run_retention_sec` are
+    never evicted, so running and recent runs keep every frame their
+    packages and later stages point to. Older manifests are deleted.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 500 * 1024 * 1024,
+        run_retention_sec: float = 24 * 3600,
+    ):
+        self.directory = directory
+        self.manifest_dir = os.path.join(directory, "manifests")
+        self.max_bytes = max_bytes
+        self.run_retention_sec = run_retention_sec
+        self._lock = threading.Lock()
+        # Manifest path -> (mtime_ns, keys), so unchanged manifests are not re-read
+        self._manifest_keys: Dict[str, Tuple[int, Set[str]]] = {}
+        os.makedirs(self.manifest_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(prompt: str, width: int, height: int, model: Optional[str]) -> str:
+        payload = json.dumps([prompt, width, height, model or "default"])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.jpeg")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the stored image path for `key`, or None. A hit refreshes the
+        file's mtime, which is what eviction orders by.
+        """
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def added(self, key: str):
+        """
+        Called after a new image is written to path_for(key).
+        """
+        self._evict(keep=key)
+
+    def record(self, run_id: str, scene_id, key: str, reused: bool):
+        """
+        Adds one image to the manifest of `run_id`.
+        """
+        manifest_path = os.path.join(self.manifest_dir, f"{run_id}.json")
+        with self._lock:
+            try:
+                with open(manifest_path, "r") as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = {"run_id": run_id, "images": []}
+
+            manifest["images"].append(
+                {
+                    "scene_id": scene_id,
+                    "key": key,
+                    "image_path": self.path_for(key),
+                    "reused": reused,
+                    "recorded_at": time.time(),
+                }
+            )
+
+            tmp_path = f"{manifest_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, manifest_path)
+
+    def _evict(self, keep: Optional[str] = None):
+        with self._lock:
+            pinned = self._pinned_keys()
+            if keep is not None:
+                # Written but not yet recorded in its run's manifest
+                pinned.add(keep)
+
+            files = []
+            total_bytes = 0
+            for entry in os.scandir(self.directory):
+                if not entry.is_file() or not entry.name.endswith(".jpeg"):
+                    continue
+                stat = entry.stat()
+                total_bytes += stat.st_size
+                if entry.name[: -len(".jpeg")] not in pinned:
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+
+            for _, size, path in sorted(files):
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    logger.info(f"Evicted stored image {path}")
+                except OSError:
+                    pass
+                total_bytes -= size
+
+    def _pinned_keys(self) -> Set[str]:
+        # Keys used by runs within the retention window; deletes older
+        # manifests. Caller must hold self._lock.
+        cutoff_ns = time.time_ns() - int(self.run_retention_sec * 1e9)
+        pinned: Set[str] = set()
+        seen = set()
+        for entry in os.scandir(self.manifest_dir):
+            if not entry.is_file() or not entry.name.endswith(".json"):
+                continue
+            try:
+                mtime_ns = entry.stat().st_mtime_ns
+                if mtime_ns < cutoff_ns:
+                    os.remove(entry.path)
+                    logger.info(f"Deleted expired manifest {entry.path}")
+                    continue
+            except OSError:
+                continue
+
+            seen.add(entry.path)
+            cached = self._manifest_keys.get(entry.path)
+            if cached is None or cached[0] != mtime_ns:
+                try:
+                    with open(entry.path, "r") as f:
+                        images = json.load(f).get("images", [])
+                except (OSError, ValueError):
+                    continue
+                cached = (mtime_ns, {image.get("key") for image in images})
+                self._manifest_keys[entry.path] = cached
+            pinned |= cached[1]
+
+        for path in set(self._manifest_keys) - seen:
+            del self._manifest_keys[path]
+        return pinned
+
+
+# --- Process-wide Image Store ---
+_image_store: Optional[ImageStore] = None
+_image_store_lock = threading.Lock()
+
+
+def get_image_store() -> ImageStore:
+    """
+    Returns the shared image store, rooted at the configured images path.
+    """
+    global _image_store
+    with _image_store_lock:
+        if _image_store is None:
+            config = load_config()
+            store_config = config.get("image_store", {})
+            _image_store = ImageStore(
+                directory=config.get("paths", {}).get("images", "outputs/images"),
+                max_bytes=store_config.get("max_mb", 500) * 1024 * 1024,
+                run_retention_sec=store_config.get("run_retention_hours", 24) * 3600,
+            )
+        return _image_store
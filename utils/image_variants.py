@@ -0,0 +1,82 @@
+"""
+Pillow work for storyboard post-processing.
+
+These functions run in worker processes, so they are top-level (picklable)
+and this module imports nothing from the pipeline.
+"""
+
+import math
+import os
+from typing import Dict, List, Sequence, Tuple
+
+from PIL import Image
+
+
+def make_variants(
+    image_path: str,
+    thumbnail_path: str,
+    webp_path: str,
+    thumbnail_size: Tuple[int, int] = (320, 320),
+    webp_quality: int = 80,
+) -> Dict[str, str]:
+    """
+    Writes a JPEG thumbnail and a full-size WebP copy of one frame.
+    """
+    os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+    os.makedirs(os.path.dirname(webp_path), exist_ok=True)
+
+    with Image.open(image_path) as image:
+        image = image.convert("RGB")
+        image.save(webp_path, "WEBP", quality=webp_quality, method=4)
+
+        image.thumbnail(thumbnail_size, Image.Resampling.LANCZOS)
+        image.save(thumbnail_path, "JPEG", quality=85, optimize=True)
+
+    return {"thumbnail": thumbnail_path, "webp": webp_path}
+
+
+def make_contact_sheet(
+    image_paths: Sequence[str],
+    output_path: str,
+    columns: int = 4,
+    cell_width: int = 256,
+    padding: int = 8,
+) -> str:
+    """
+    Tiles every frame, in order, into one JPEG grid. Frames that cannot be
+    read are left out; raises ValueError if none can.
+    """
+    cells: List[Image.Image] = []
+    for path in image_paths:
+        try:
+            with Image.open(path) as image:
+                # Let the JPEG decoder scale down while decoding
+                image.draft("RGB", (cell_width, cell_width))
+                cell = image.convert("RGB")
+                cell.thumbnail((cell_width, cell_width), Image.Resampling.LANCZOS)
+                cells.append(cell)
+        except (OSError, ValueError):
+            continue
+    if not cells:
+        raise ValueError("No readable frames for the contact sheet")
+
+    columns = max(1, min(columns, len(cells)))
+    rows = math.ceil(len(cells) / columns)
+    cell_height = max(cell.height for cell in cells)
+    sheet = Image.new(
+        "RGB",
+        (
+            columns * cell_width + (columns + 1) * padding,
+            rows * cell_height + (rows + 1) * padding,
+        ),
+        (16, 16, 16),
+    )
+    for index, cell in enumerate(cells):
+        row, column = divmod(index, columns)
+        x = padding + column * (cell_width + padding) + (cell_width - cell.width) // 2
+        y = padding + row * (cell_height + padding) + (cell_height - cell.height) // 2
+        sheet.paste(cell, (x, y))
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    sheet.save(output_path, "JPEG", quality=85, optimize=True)
+    return output_path
@@ -0,0 +1,247 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from utils.config import load_config
+from utils.logger import get_logger
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+# --- Job Status Values ---
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """
+    Raised when the job manager has no free worker or queue slot.
+    """
+
+
+class FairSlots:
+    """
+    A counting semaphore that hands freed slots to waiters in arrival order,
+    so a thread that releases a slot cannot take it straight back ahead of
+    threads already waiting (as a batch moving to its next idea would).
+    """
+
+    def __init__(self, count: int):
+        self._free = count
+        self._waiters: "deque[threading.Event]" = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._free and not self._waiters:
+                self._free -= 1
+                return
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+        waiter.wait()
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # The slot passes straight to the longest waiter
+                self._waiters.popleft().set()
+            else:
+                self._free += 1
+
+
+@dataclass
+class Job:
+    """
+    A single background pipeline run, tracked by its job ID.
+    """
+
+    job_id: str
+    status: str = JOB_QUEUED
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JOB_SUCCEEDED, JOB_FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded worker pool.
+
+    At most `max_workers` jobs run at once and at most `max_queue_size` more
+    wait for a worker. Anything beyond that is rejected with QueueFullError
+    instead of piling up unbounded work.
+
+    Each pipeline a job runs holds one of `max_workers` pipeline slots
+    (see pipeline_slot). Coordinator jobs, such as a batch, run no pipeline
+    themselves: they run on a separate pool of `max_coordinators` threads
+    (see submit_coordinator), so they never occupy a job worker, while each
+    pipeline they start still holds a pipeline slot.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue_size: int = 32,
+        max_retained_jobs: int = 1000,
+        max_coordinators: int = 2,
+    ):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._max_retained_jobs = max_retained_jobs
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job-worker"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue_size)
+        self._coordinator_executor = ThreadPoolExecutor(
+            max_workers=max_coordinators, thread_name_prefix="job-coordinator"
+        )
+        self._coordinator_slots = threading.BoundedSemaphore(max_coordinators + max_queue_size)
+        self._pipeline_slots = FairSlots(max_workers)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        Queues `fn(*args, **kwargs)` and returns its Job right away.
+        """
+        return self._submit(self._executor, self._slots, fn, args, kwargs)
+
+    def submit_coordinator(self, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        Queues a job that only coordinates pipelines run under
+        pipeline_slot(), such as a batch, on the coordinator pool.
+        """
+        return self._submit(self._coordinator_executor, self._coordinator_slots, fn, args, kwargs)
+
+    def _submit(
+        self,
+        executor: ThreadPoolExecutor,
+        slots: threading.BoundedSemaphore,
+        fn: Callable[..., Any],
+        args: tuple,
+        kwargs: dict,
+    ) -> Job:
+        if not slots.acquire(blocking=False):
+            raise QueueFullError("Job queue is full. Try again later.")
+
+        job = Job(job_id=uuid.uuid4().hex)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._evict_finished_jobs()
+
+        try:
+            executor.submit(self._run, job, slots, fn, args, kwargs)
+        except Exception:
+            slots.release()
+            raise
+
+        logger.info(f"Job {job.job_id} queued.")
+        return job
+
+    @contextmanager
+    def pipeline_slot(self) -> Iterator[None]:
+        """
+        Holds one of the `max_workers` pipeline slots for the enclosed run,
+        waiting in line for one to free up if needed.
+        """
+        self._pipeline_slots.acquire()
+        try:
+            yield
+        finally:
+            self._pipeline_slots.release()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Returns the number of retained jobs in each status.
+        """
+        counts = {status: 0 for status in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED)}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return counts
+
+    def shutdown(self, wait: bool = True):
+        self._coordinator_executor.shutdown(wait=wait)
+        self._executor.shutdown(wait=wait)
+
+    def _run(
+        self,
+        job: Job,
+        slots: threading.BoundedSemaphore,
+        fn: Callable[..., Any],
+        args: tuple,
+        kwargs: dict,
+    ):
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        logger.info(f"Job {job.job_id} started.")
+
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = JOB_SUCCEEDED
+            logger.info(f"Job {job.job_id} succeeded.")
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}")
+            job.error = str(e)
+            job.status = JOB_FAILED
+        finally:
+            job.finished_at = time.time()
+            slots.release()
+
+    def _evict_finished_jobs(self):
+        # Drop the oldest finished jobs so the registry does not grow forever.
+        # Caller must hold self._lock.
+        excess = len(self._jobs) - self._max_retained_jobs
+        if excess <= 0:
+            return
+        for job_id in [j.job_id for j in self._jobs.values() if j.done][:excess]:
+            del self._jobs[job_id]
+
+
+# --- Process-wide Job Manager ---
+_job_manager: Optional[JobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """
+    Returns the process-wide JobManager, built from the "jobs" config section.
+    """
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            jobs_config = load_config().get("jobs", {})
+            _job_manager = JobManager(
+                max_workers=jobs_config.get("max_workers", 4),
+                max_queue_size=jobs_config.get("max_queue_size", 32),
+                max_retained_jobs=jobs_config.get("max_retained_jobs", 1000),
+                max_coordinators=jobs_config.get("max_batches", 2),
+            )
+        return _job_manager
@@ -0,0 +1,70 @@
+import json
+import re
+from typing import Any, Dict, List
+
+
+class JsonArrayStreamParser:
+    """
+    Incrementally extracts the objects of one top-level JSON array while the
+    document is still arriving, e.g. the "scenes" list of
+    {"scenes": [{...}, {...}]} streamed from an LLM.
+
+    feed() returns every object that was completed by the new chunk.
+    """
+
+    def __init__(self, key: str):
+        self._array_start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = -1
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._buffer += chunk
+        completed = []
+
+        if self._done:
+            return completed
+
+        if not self._in_array:
+            match = self._array_start.search(self._buffer)
+            if not match:
+                return completed
+            self._in_array = True
+            self._pos = match.end()
+
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            char = buffer[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0 and char == "{":
+                    self._object_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # The closing bracket of the target array
+                    self._done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._object_start >= 0:
+                    obj = buffer[self._object_start : self._pos + 1]
+                    completed.append(json.loads(obj))
+                    self._object_start = -1
+
+            self._pos += 1
+
+        return completed
@@ -0,0 +1,319 @@
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.circuit_breaker import get_circuit_breaker
+from utils.config import ConfigError, Settings, load_config, register_reload_hook
+from utils.llm_cache import LLMCache, get_llm_cache, make_cache_key
+from utils.logger import current_log_context, get_logger
+from utils.metrics import (
+    LLM_CACHE_REQUESTS,
+    LLM_HEDGES,
+    LLM_RETRIES,
+    LLM_TOKENS,
+    metadata_lock,
+    record_call,
+    track_call,
+)
+from utils.retry import RetryPolicy, call_with_retry, get_hedge_executor, hedged_call, is_retryable
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+# The Gemini SDK is imported and configured on first use, so importing an
+# agent (or starting the API) does not pay for it
+_genai = None
+_genai_lock = threading.Lock()
+
+# Optional stand-in for genai.GenerativeModel, called as
+# factory(model_key, model_name, system_instruction, generation_config).
+# Used by the offline benchmarks; None means the real Gemini SDK.
+_model_factory: Optional[Callable[..., Any]] = None
+
+
+def set_model_factory(factory: Optional[Callable[..., Any]]):
+    """
+    Builds every GeminiModel's underlying model with `factory` instead of
+    the Gemini SDK. Models already built keep their current client.
+    """
+    global _model_factory
+    _model_factory = factory
+
+
+def get_genai():
+    """
+    Imports and configures google.generativeai once, on first use.
+    """
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=load_config().api_keys["google_api_key"])
+            _genai = genai
+        return _genai
+
+
+@dataclass
+class UsageMetadata:
+    total_token_count: int
+
+
+@dataclass
+class LLMResponse:
+    """
+    The parts of a Gemini response the agents use.
+    """
+
+    text: str
+    usage_metadata: UsageMetadata
+    cached: bool = False
+
+
+def record_count(metadata: Optional[Dict[str, Any]], key: str, amount: int = 1):
+    """
+    Adds `amount` to a counter in a StoryState.metadata dict.
+    """
+    if metadata is None:
+        return
+    with metadata_lock:
+        metadata[key] = metadata.get(key, 0) + amount
+
+
+def record_retry_stat(metadata: Optional[Dict[str, Any]], stage: str, key: str):
+    """
+    Adds one to metadata["llm_retry_stats"][stage][key].
+    """
+    if metadata is None:
+        return
+    with metadata_lock:
+        stats = metadata.setdefault("llm_retry_stats", {}).setdefault(
+            stage, {"retries": 0, "hedges": 0, "hedge_wins": 0}
+        )
+        stats[key] += 1
+
+
+class GeminiModel:
+    """
+    A Gemini model whose generate_content goes through the shared LLM cache.
+
+    Requests are keyed on model name, system prompt, user prompt and
+    generation config. A cache hit costs no tokens, so its response reports
+    a total_token_count of 0.
+
+    The model name is read from `models.<model_key>` in the config. When
+    settings.yaml is reloaded with a different name, the next request uses
+    the new model without a restart. The underlying model is only built on
+    the first request.
+
+    Transient errors are retried with backoff, and slow calls can be hedged,
+    as set in the "llm_retry" config section (see _generate).
+    """
+
+    def __init__(
+        self,
+        model_key: str,
+        system_instruction: Optional[str] = None,
+        generation_config: Optional[Dict[str, Any]] = None,
+        cache: Optional[LLMCache] = None,
+        default_model: Optional[str] = None,
+    ):
+        self.model_key = model_key
+        self.default_model = default_model
+        self.system_instruction = system_instruction
+        self.generation_config = generation_config or {}
+        self._cache = cache
+        self._lock = threading.Lock()
+        self.model_name = self._configured_model_name(load_config())
+        self._model = None
+        register_reload_hook(self._on_config_reload)
+
+    def _configured_model_name(self, settings: Settings) -> str:
+        model_name = settings.models.get(self.model_key, self.default_model)
+        if not model_name:
+            raise ConfigError(f"No model configured for 'models.{self.model_key}'")
+        return model_name
+
+    def _build_model(self, model_name: str) -> Any:
+        if _model_factory is not None:
+            return _model_factory(
+                self.model_key,
+                model_name,
+                self.system_instruction,
+                self.generation_config or None,
+            )
+        return get_genai().GenerativeModel(
+            model_name=model_name,
+            system_instruction=self.system_instruction,
+            generation_config=self.generation_config or None,
+        )
+
+    def _on_config_reload(self, settings: Settings):
+        model_name = self._configured_model_name(settings)
+        with self._lock:
+            if model_name == self.model_name:
+                return
+            logger.info(
+                f"Model for '{self.model_key}' changed: {self.model_name} -> {model_name}"
+            )
+            # Rebuilt with the new name on the next request
+            self._model = None
+            self.model_name = model_name
+
+    def _current_model(self) -> Tuple[str, Any]:
+        # load_config() is a cheap mtime check; it fires the reload hook above
+        # if settings.yaml changed since the last request
+        load_config()
+        with self._lock:
+            if self._model is None:
+                self._model = self._build_model(self.model_name)
+            return self.model_name, self._model
+
+    def generate_content(
+        self,
+        prompt: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        on_chunk: Optional[Callable[[str], None]] = None,
+    ) -> LLMResponse:
+        """
+        Returns the cached response for `prompt`, or calls Gemini and caches it.
+        Hit and miss counts are added to `metadata` if given.
+
+        If `on_chunk` is given, the response is streamed and `on_chunk` is
+        called with each text chunk as it arrives (a cache hit arrives as a
+        single chunk). The full response is still returned at the end.
+        """
+        model_name, model = self._current_model()
+        key = make_cache_key(
+            model_name, self.system_instruction, prompt, self.generation_config
+        )
+
+        cache = self._cache or get_llm_cache()
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info(f"LLM cache hit for {model_name}.")
+            record_count(metadata, "llm_cache_hits")
+            LLM_CACHE_REQUESTS.inc(model=model_name, result="hit")
+            if on_chunk is not None:
+                on_chunk(cached["text"])
+            return LLMResponse(
+                text=cached["text"],
+                usage_metadata=UsageMetadata(total_token_count=0),
+                cached=True,
+            )
+
+        record_count(metadata, "llm_cache_misses")
+        LLM_CACHE_REQUESTS.inc(model=model_name, result="miss")
+        result = self._generate(model, model_name, prompt, metadata, on_chunk)
+        LLM_TOKENS.inc(result.usage_metadata.total_token_count, model=model_name)
+        if self._is_cacheable(result.text):
+            cache.set(
+                key,
+                {
+                    "text": result.text,
+                    "total_token_count": result.usage_metadata.total_token_count,
+                },
+            )
+        return result
+
+    def _generate(
+        self,
+        model: Any,
+        model_name: str,
+        prompt: str,
+        metadata: Optional[Dict[str, Any]],
+        on_chunk: Optional[Callable[[str], None]],
+    ) -> LLMResponse:
+        """
+        Calls Gemini, retrying rate limits, 5xx responses and network errors
+        with jittered exponential backoff.
+
+        With llm_retry.hedge_after_sec set, a non-streaming call that has
+        not answered in that time is sent a second time and the first
+        answer wins. A stream is never hedged, and is only retried if it
+        failed before its first chunk, since chunks already passed to
+        `on_chunk` cannot be taken back.
+
+        Retries and hedges are counted per stage in
+        metadata["llm_retry_stats"]. A hedged pair counts as one call in
+        metadata["external_calls"], timed as the caller waited for it.
+
+        Each model has a circuit breaker. While it is open, calls raise
+        CircuitOpenError at once and are not retried, so agents fall back
+        (or fail the stage) without waiting on an unhealthy model.
+        """
+        retry_config = load_config().get("llm_retry", {})
+        policy = RetryPolicy.from_config(retry_config)
+        stage = current_log_context().get("stage") or self.model_key
+        breaker = get_circuit_breaker(f"gemini:{model_name}")
+        streamed = False
+
+        def attempt(call_metadata: Optional[Dict[str, Any]] = metadata) -> LLMResponse:
+            nonlocal streamed
+            with breaker.protect(), track_call("gemini", model_name, call_metadata):
+                if on_chunk is None:
+                    response = model.generate_content(prompt)
+                else:
+                    response = model.generate_content(prompt, stream=True)
+                    for chunk in response:
+                        streamed = True
+                        on_chunk(chunk.text)
+
+                return LLMResponse(
+                    text=response.text,
+                    usage_metadata=UsageMetadata(
+                        total_token_count=response.usage_metadata.total_token_count
+                    ),
+                )
+
+        def hedged_attempt() -> LLMResponse:
+            # The slower copy keeps running after this returns, possibly past
+            # the run's packaging, so neither copy writes to the run's metadata
+            start = time.perf_counter()
+            failed = True
+            try:
+                result, hedge_sent, hedge_won = hedged_call(
+                    lambda: attempt(None),
+                    policy.hedge_after_sec,
+                    get_hedge_executor(retry_config.get("hedge_workers", 64)),
+                )
+                failed = False
+            finally:
+                record_call(
+                    metadata, f"gemini.{model_name}", time.perf_counter() - start, failed
+                )
+            if hedge_sent:
+                record_retry_stat(metadata, stage, "hedges")
+                LLM_HEDGES.inc(model=model_name, stage=stage, outcome="sent")
+            if hedge_won:
+                record_retry_stat(metadata, stage, "hedge_wins")
+                LLM_HEDGES.inc(model=model_name, stage=stage, outcome="won")
+            return result
+
+        def on_retry(attempt_number: int, error: BaseException, delay: float):
+            logger.warning(
+                f"Gemini call for '{stage}' failed ({error}). "
+                f"Retry {attempt_number} in {delay:.2f}s."
+            )
+            record_retry_stat(metadata, stage, "retries")
+            LLM_RETRIES.inc(model=model_name, stage=stage)
+
+        hedge = on_chunk is None and policy.hedge_after_sec is not None
+        return call_with_retry(
+            hedged_attempt if hedge else attempt,
+            policy,
+            on_retry=on_retry,
+            retryable=lambda error: not streamed and is_retryable(error),
+        )
+
+    def _is_cacheable(self, text: str) -> bool:
+        # Never cache malformed JSON, or a retry would get the same bad answer
+        if self.generation_config.get("response_mime_type") != "application/json":
+            return True
+        try:
+            json.loads(text)
+            return True
+        except ValueError:
+            return False
@@ -0,0 +1,295 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.config import load_config
+from utils.logger import get_logger
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+
+def make_cache_key(
+    model_name: str,
+    system_prompt: Optional[str],
+    user_prompt: str,
+    generation_config: Optional[Dict[str, Any]],
+) -> str:
+    """
+    Content-addressed key for one LLM request.
+    """
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "system": system_prompt or "",
+            "prompt": user_prompt,
+            "config": generation_config or {},
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# --- Cache Tiers ---
+
+
+class CacheTier(ABC):
+    """
+    Interface for one cache tier. Values are JSON-serializable dicts, kept
+    with the time they were first cached, which each tier's TTL counts from.
+    """
+
+    @abstractmethod
+    def get_entry(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """
+        Returns (created_at, value), or None on a miss.
+        """
+        ...
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.get_entry(key)
+        return None if entry is None else entry[1]
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any], created_at: Optional[float] = None):
+        """
+        Stores `value`, created now unless `created_at` is given.
+        """
+        ...
+
+
+class MemoryCacheTier(CacheTier):
+    """
+    In-process LRU with a maximum entry count and a TTL.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_sec: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self.ttl_sec:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Dict[str, Any], created_at: Optional[float] = None):
+        if created_at is None:
+            created_at = time.time()
+        elif time.time() - created_at > self.ttl_sec:
+            # Already past this tier's TTL
+            return
+        with self._lock:
+            self._entries[key] = (created_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class DiskCacheTier(CacheTier):
+    """
+    One JSON file per key, with a TTL and a total size cap.
+
+    A file's mtime is its creation time, which the TTL counts from; a hit
+    only moves its atime, so evicting by oldest atime drops the least
+    recently used entries first.
+
+    Writes keep a running total of the directory size instead of scanning
+    it. The directory is scanned only when the total passes `max_bytes`
+    (then entries are evicted down to 90% of it, so the next scan is many
+    writes away) or `sweep_interval_sec` after the last scan, which also
+    drops expired entries and corrects the total for other processes.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 100 * 1024 * 1024,
+        ttl_sec: float = 86400,
+        sweep_interval_sec: float = 300,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_sec = ttl_sec
+        self.sweep_interval_sec = sweep_interval_sec
+        self._lock = threading.Lock()
+        # None until the first scan
+        self._total_bytes: Optional[int] = None
+        self._last_sweep = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        created_at = entry.get("created_at", 0)
+        if time.time() - created_at > self.ttl_sec or entry.get("value") is None:
+            self._remove(path)
+            return None
+
+        try:
+            # Mark it used, keeping its creation time as the mtime
+            os.utime(path, (time.time(), created_at))
+        except OSError:
+            pass
+        return created_at, entry["value"]
+
+    def set(self, key: str, value: Dict[str, Any], created_at: Optional[float] = None):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"created_at": created_at or time.time(), "value": value}, f)
+        if created_at is not None:
+            # The mtime is what the sweep ages entries by
+            os.utime(tmp_path, (time.time(), created_at))
+        added_bytes = os.path.getsize(tmp_path)
+        try:
+            added_bytes -= os.path.getsize(path)
+        except OSError:
+            pass
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += added_bytes
+            if (
+                self._total_bytes is None
+                or self._total_bytes > self.max_bytes
+                or time.monotonic() - self._last_sweep >= self.sweep_interval_sec
+            ):
+                self._evict()
+
+    def _evict(self):
+        # Caller must hold self._lock
+        files = []
+        total_bytes = 0
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl_sec:
+                self._remove(entry.path)
+                continue
+            files.append((stat.st_atime, stat.st_size, entry.path))
+            total_bytes += stat.st_size
+
+        if total_bytes > self.max_bytes:
+            target_bytes = self.max_bytes * 0.9
+            for _, size, path in sorted(files):
+                if total_bytes <= target_bytes:
+                    break
+                self._remove(path)
+                total_bytes -= size
+
+        self._total_bytes = total_bytes
+        self._last_sweep = time.monotonic()
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# --- Cache ---
+
+
+class LLMCache:
+    """
+    A read-through chain of cache tiers, fastest first.
+
+    A hit in a slower tier is copied into the faster tiers above it with
+    its original creation time, so it expires no later than it would have
+    where it was found.
+    """
+
+    def __init__(self, tiers: List[CacheTier], enabled: bool = True):
+        self.tiers = tiers
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+
+        for index, tier in enumerate(self.tiers):
+            try:
+                entry = tier.get_entry(key)
+            except Exception as e:
+                logger.warning(f"LLM cache tier {type(tier).__name__} read failed: {e}")
+                continue
+            if entry is not None:
+                created_at, value = entry
+                for faster_tier in self.tiers[:index]:
+                    faster_tier.set(key, value, created_at=created_at)
+                with self._lock:
+                    self.hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        if not self.enabled:
+            return
+
+        for tier in self.tiers:
+            try:
+                tier.set(key, value)
+            except Exception as e:
+                logger.warning(f"LLM cache tier {type(tier).__name__} write failed: {e}")
+
+
+# --- Process-wide Cache ---
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """
+    Returns the process-wide LLM cache, built from the "llm_cache" config section.
+    """
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            cache_config = load_config().get("llm_cache", {})
+            tiers = [
+                MemoryCacheTier(
+                    max_entries=cache_config.get("memory_max_entries", 256),
+                    ttl_sec=cache_config.get("memory_ttl_sec", 3600),
+                ),
+                DiskCacheTier(
+                    directory=cache_config.get("disk_dir", "outputs/cache/llm"),
+                    max_bytes=cache_config.get("disk_max_mb", 100) * 1024 * 1024,
+                    ttl_sec=cache_config.get("disk_ttl_sec", 86400),
+                ),
+            ]
+            _llm_cache = LLMCache(tiers, enabled=cache_config.get("enabled", True))
+        return _llm_cache
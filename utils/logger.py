@@ -1,34 +1,147 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
+import queue
 import sys
-from rich.logging import RichHandler
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
 from utils.env import load_env
 
 # --- Configuration ---
 
 env = load_env()
 LOG_LEVEL = env.get("LOG_LEVEL", "INFO").upper()
+# "rich" (colourful, synchronous, for development) or "json" (one JSON
+# object per line, written by a background thread, for production)
+LOG_MODE = (
+    env.get("LOG_MODE") or ("json" if env.get("APP_ENV") == "production" else "rich")
+).lower()
+
+# --- Log Context ---
+# IDs attached to every record logged while they are set. The stage graph
+# and the image scheduler copy context variables into their worker threads.
+LOG_CONTEXT_FIELDS = ("run_id", "stage", "scene_id")
+_context_vars = {
+    name: contextvars.ContextVar(f"log_{name}", default=None) for name in LOG_CONTEXT_FIELDS
+}
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """
+    Tags every record logged inside the block (and in work it hands to
+    stage or scene threads) with the given run_id, stage or scene_id.
+    """
+    tokens = [
+        (_context_vars[name], _context_vars[name].set(value)) for name, value in fields.items()
+    ]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def current_log_context() -> Dict[str, Any]:
+    """
+    Returns the log context fields set in the current context.
+    """
+    return {name: var.get() for name, var in _context_vars.items() if var.get() is not None}
+
+
+class ContextFilter(logging.Filter):
+    """
+    Copies the current log context onto each record. Runs in the logging
+    thread, before the record is queued.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, var in _context_vars.items():
+            setattr(record, name, var.get())
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one compact JSON line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for name in LOG_CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False, separators=(",", ":"))
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and a plain traceback (no locals) now, since
+        # args and frames may change before the listener thread formats it
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
 
 # --- Logger Setup ---
 
-# We configure the root logger once when this module is imported.
-logging.basicConfig(
-    level=LOG_LEVEL,
-    format="%(message)s",  # RichHandler handles the formatting
-    datefmt="[%X]",
-    handlers=[
-        RichHandler(
+
+def _build_handler() -> logging.Handler:
+    if LOG_MODE == "json":
+        # Callers only enqueue; a single background thread formats and writes
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter())
+        listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        listener.start()
+        # Flush whatever is still queued when the process exits
+        atexit.register(listener.stop)
+        handler = _QueueHandler(log_queue)
+    else:
+        from rich.logging import RichHandler
+
+        handler = RichHandler(
             rich_tracebacks=True,
             tracebacks_show_locals=True,
             show_path=True,
             markup=True,
         )
-    ],
+    handler.addFilter(ContextFilter())
+    return handler
+
+
+# We configure the root logger once when this module is imported.
+logging.basicConfig(
+    level=LOG_LEVEL,
+    format="%(message)s",  # RichHandler handles the formatting
+    datefmt="[%X]",
+    handlers=[_build_handler()],
 )
 
 
 def get_logger(name: str) -> logging.Logger:
     """
-    Retrieves a logger instance configured with RichHandler.
+    Retrieves a logger instance configured with the handler for LOG_MODE.
 
     Args:
         name: The name for the logger (typically __name__).
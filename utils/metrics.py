@@ -0,0 +1,282 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets. Stages and image
+# calls take tens of seconds, so the buckets reach well past a minute.
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Guards every counter and breakdown that concurrent workers write into the
+# same StoryState.metadata, here and in utils.llm
+metadata_lock = threading.Lock()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    """
+    A metric family: one value (or histogram) per combination of label values.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        ...
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}"
+            for k, v in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # [count per bucket..., sum]
+                series = self._values[key] = [0] * len(self.buckets) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                labels = _format_labels(
+                    self.label_names + ("le",), key + (_format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {series[-2]}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds every metric in the process and renders them in the Prometheus
+    text exposition format.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, label_names))
+
+    def gauge(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# --- Process-wide Metrics ---
+REGISTRY = MetricsRegistry()
+
+PIPELINE_DURATION = REGISTRY.histogram(
+    "storycrafter_pipeline_duration_seconds", "Wall-clock time of a pipeline run.", ("status",)
+)
+PIPELINES_IN_FLIGHT = REGISTRY.gauge(
+    "storycrafter_pipelines_in_flight", "Pipeline runs currently executing."
+)
+PIPELINES_IN_FLIGHT.set(0)
+STAGE_DURATION = REGISTRY.histogram(
+    "storycrafter_stage_duration_seconds", "Wall-clock time of a pipeline stage.", ("stage",)
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "storycrafter_stage_errors_total", "Pipeline stages that failed.", ("stage",)
+)
+STAGES_IN_FLIGHT = REGISTRY.gauge(
+    "storycrafter_stages_in_flight", "Pipeline stages currently executing.", ("stage",)
+)
+EXTERNAL_CALL_DURATION = REGISTRY.histogram(
+    "storycrafter_external_call_duration_seconds",
+    "Latency of calls to Gemini, Stablecog and Tavily.",
+    ("service", "operation"),
+)
+EXTERNAL_CALL_ERRORS = REGISTRY.counter(
+    "storycrafter_external_call_errors_total",
+    "Calls to external services that raised an error.",
+    ("service", "operation"),
+)
+EXTERNAL_CALLS_IN_FLIGHT = REGISTRY.gauge(
+    "storycrafter_external_calls_in_flight",
+    "Calls to external services currently waiting on a response.",
+    ("service",),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "storycrafter_llm_tokens_total", "Tokens billed by Gemini.", ("model",)
+)
+LLM_CACHE_REQUESTS = REGISTRY.counter(
+    "storycrafter_llm_cache_requests_total", "LLM cache lookups.", ("model", "result")
+)
+LLM_RETRIES = REGISTRY.counter(
+    "storycrafter_llm_retries_total",
+    "Gemini calls retried after a transient error.",
+    ("model", "stage"),
+)
+LLM_HEDGES = REGISTRY.counter(
+    "storycrafter_llm_hedges_total",
+    "Hedged duplicate Gemini requests, sent and won.",
+    ("model", "stage", "outcome"),
+)
+CIRCUIT_BREAKER_STATE = REGISTRY.gauge(
+    "storycrafter_circuit_breaker_state",
+    "Circuit breaker state per external service (0 closed, 1 half-open, 2 open).",
+    ("breaker",),
+)
+CIRCUIT_BREAKER_REJECTIONS = REGISTRY.counter(
+    "storycrafter_circuit_breaker_rejections_total",
+    "Calls failed fast because a circuit breaker was open.",
+    ("breaker",),
+)
+
+# Snapshots refreshed each time /metrics is scraped
+JOBS = REGISTRY.gauge("storycrafter_jobs", "Retained background jobs by status.", ("status",))
+IMAGE_REQUESTS = REGISTRY.gauge(
+    "storycrafter_image_requests",
+    "Image generations waiting in the shared scheduler or running.",
+    ("state",),
+)
+
+
+def record_call(
+    metadata: Optional[Dict[str, Any]], name: str, duration: float, failed: bool
+):
+    """
+    Adds one external call to the per-run breakdown in
+    metadata["external_calls"][name].
+    """
+    if metadata is None:
+        return
+    with metadata_lock:
+        stats = metadata.setdefault("external_calls", {}).setdefault(
+            name, {"calls": 0, "errors": 0, "total_sec": 0.0, "max_sec": 0.0}
+        )
+        stats["calls"] += 1
+        stats["errors"] += int(failed)
+        stats["total_sec"] = round(stats["total_sec"] + duration, 3)
+        stats["max_sec"] = round(max(stats["max_sec"], duration), 3)
+
+
+@contextmanager
+def track_call(
+    service: str, operation: str, metadata: Optional[Dict[str, Any]] = None
+) -> Iterator[None]:
+    """
+    Times the enclosed call to an external service. Records its latency,
+    whether it raised, and the in-flight count, both process-wide and in
+    the run's `metadata` if given.
+    """
+    EXTERNAL_CALLS_IN_FLIGHT.inc(service=service)
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        EXTERNAL_CALL_ERRORS.inc(service=service, operation=operation)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        EXTERNAL_CALLS_IN_FLIGHT.dec(service=service)
+        EXTERNAL_CALL_DURATION.observe(duration, service=service, operation=operation)
+        record_call(metadata, f"{service}.{operation}", duration, failed)
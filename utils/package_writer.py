@@ -0,0 +1,99 @@
+import gzip
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from utils.config import load_config
+from utils.logger import get_logger
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library is used instead
+    orjson = None
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+
+def dumps_compact(data: Any) -> bytes:
+    """
+    Serializes `data` as compact UTF-8 JSON, with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=str, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+class PackageWriter:
+    """
+    Saves each run's final package to `<directory>/<run_id>.json` (or
+    `.json.gz`) on a background thread, so callers never wait on the disk.
+
+    One writer thread is enough: serializing a package is fast, and a
+    single thread keeps writes from competing with each other for I/O.
+    """
+
+    def __init__(self, directory: str, compress: bool = False):
+        self.directory = directory
+        self.compress = compress
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="package-writer")
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, run_id: str) -> str:
+        extension = ".json.gz" if self.compress else ".json"
+        return os.path.join(self.directory, f"{os.path.basename(run_id)}{extension}")
+
+    def submit(self, package: Dict[str, Any]) -> "Future[str]":
+        """
+        Queues `package` to be written and returns a Future of its path.
+        The package must not be modified after it is submitted.
+        """
+        return self._executor.submit(self._write, package)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _write(self, package: Dict[str, Any]) -> str:
+        path = self.path_for(package["run_id"])
+        data = dumps_compact(package)
+        if self.compress:
+            data = gzip.compress(data, compresslevel=5)
+
+        # Write then rename, so a reader never sees a partial file
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Could not save package for run {package['run_id']}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        logger.info(f"Final package saved to {path}")
+        return path
+
+
+# --- Process-wide Package Writer ---
+_package_writer: Optional[PackageWriter] = None
+_package_writer_lock = threading.Lock()
+
+
+def get_package_writer() -> PackageWriter:
+    """
+    Returns the shared writer, saving to the configured "final" path.
+    """
+    global _package_writer
+    with _package_writer_lock:
+        if _package_writer is None:
+            config = load_config()
+            _package_writer = PackageWriter(
+                directory=config.get("paths", {}).get("final", "outputs/final"),
+                compress=config.get("packages", {}).get("compress", False),
+            )
+        return _package_writer
@@ -0,0 +1,56 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from utils.config import load_config
+from utils.logger import get_logger
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+
+# --- Process-wide Process Pool ---
+# For CPU-bound work (image resizing and encoding) that would otherwise hold
+# the GIL in the API process. Workers are never forked from the API process:
+# it runs many threads, and forking a threaded process can copy locks in a
+# held state. Where available they are forked from a forkserver that has
+# preloaded the task module, otherwise spawned. Either way each worker also
+# re-imports the main script as __mp_main__, which is why main.py keeps the
+# pipeline out of module scope. Tasks must be top-level functions with
+# picklable arguments, and workers start on the first task. If a worker
+# dies, the pool is broken for good, so the next caller gets a new one.
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Returns the shared pool, sized by the "process_pool" config section.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        # `_broken` is set once a worker exits abruptly
+        if _process_pool is None or getattr(_process_pool, "_broken", False):
+            pool_config = load_config().get("process_pool", {})
+            max_workers = pool_config.get("max_workers") or min(4, os.cpu_count() or 1)
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                mp_context = multiprocessing.get_context("forkserver")
+                mp_context.set_forkserver_preload(["utils.image_variants"])
+            else:
+                mp_context = multiprocessing.get_context("spawn")
+            _process_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context)
+            logger.info(f"Process pool started with {max_workers} workers")
+        return _process_pool
+
+
+def shutdown_process_pool(wait: bool = True):
+    """
+    Stops the shared pool, if it was started.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=not wait)
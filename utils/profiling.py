@@ -0,0 +1,161 @@
+import cProfile
+import contextvars
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.logger import get_logger
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+# The profiler of the run executing in this context, if it asked for one.
+# Stage and image scheduler threads run in a copy of the submitting
+# context, so they see the same profiler.
+_active_profiler: contextvars.ContextVar[Optional["RunProfiler"]] = contextvars.ContextVar(
+    "active_profiler", default=None
+)
+
+
+class RunProfiler:
+    """
+    Profiles one pipeline run across every thread it uses.
+
+    cProfile only sees the thread it is enabled in, so each profiled section
+    gets its own profiler and they are merged when the run is saved. Each
+    section label also accumulates wall-clock and CPU time: a section whose
+    wall time is far above its CPU time was waiting on the network, a lock
+    or the GIL, not computing.
+    """
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        # Set once the profile is saved
+        self.path: Optional[str] = None
+        self._profiles: List[cProfile.Profile] = []
+        self._sections: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def section(self, label: str) -> Iterator[None]:
+        # A thread can only run one cProfile at a time; nested sections in
+        # the same thread are timed but profiled by the outer section
+        nested = getattr(self._local, "active", False)
+        profile = None
+        if not nested:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                self._local.active = True
+            except ValueError:
+                # Python 3.12+ allows one active cProfile per process; the
+                # section is still timed
+                profile = None
+
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            cpu_sec = time.thread_time() - cpu_start
+            wall_sec = time.perf_counter() - wall_start
+            if profile is not None:
+                profile.disable()
+                self._local.active = False
+
+            with self._lock:
+                if profile is not None:
+                    self._profiles.append(profile)
+                totals = self._sections.setdefault(
+                    label, {"calls": 0, "wall_sec": 0.0, "cpu_sec": 0.0}
+                )
+                totals["calls"] += 1
+                totals["wall_sec"] += wall_sec
+                totals["cpu_sec"] += cpu_sec
+
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns {section label: {"calls", "wall_sec", "cpu_sec"}}.
+        """
+        with self._lock:
+            return {
+                label: {
+                    "calls": totals["calls"],
+                    "wall_sec": round(totals["wall_sec"], 4),
+                    "cpu_sec": round(totals["cpu_sec"], 4),
+                }
+                for label, totals in self._sections.items()
+            }
+
+    def save(self, directory: str) -> Optional[str]:
+        """
+        Writes the merged profile to `<directory>/<run_id>.prof` (readable with
+        pstats or snakeviz) and the top functions to `<run_id>.prof.txt`.
+        Returns the .prof path, or None if nothing was profiled.
+        """
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.run_id}.prof")
+        stats.dump_stats(path)
+        self.path = path
+
+        summary = io.StringIO()
+        pstats.Stats(path, stream=summary).sort_stats("cumulative").print_stats(40)
+        with open(f"{path}.txt", "w") as f:
+            f.write(summary.getvalue())
+
+        return path
+
+
+@contextmanager
+def profiled(label: str) -> Iterator[None]:
+    """
+    Profiles the enclosed block under `label` if the current run is being
+    profiled; otherwise does nothing.
+    """
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield
+        return
+    with profiler.section(label):
+        yield
+
+
+@contextmanager
+def profile_run(run_id: str, directory: str, label: str = "coordinator") -> Iterator[RunProfiler]:
+    """
+    Profiles everything the enclosed block runs, including work handed to
+    stage and image scheduler threads, and saves the profile on exit.
+    """
+    profiler = RunProfiler(run_id)
+    token = _active_profiler.set(profiler)
+    try:
+        with profiler.section(label):
+            yield profiler
+    finally:
+        _active_profiler.reset(token)
+        try:
+            path = profiler.save(directory)
+            logger.info(f"Profile for run {run_id} saved to {path}")
+        except Exception as e:
+            logger.warning(f"Could not save profile for run {run_id}: {e}")
+
+
+def wants_profile(value: Optional[Any]) -> bool:
+    """
+    Interprets a flag from a header or query string ("1", "true", "yes", "on").
+    """
+    return str(value or "").strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,48 @@
+import json
+from typing import Any, Dict, Mapping, Optional
+
+# A field spec maps each key to keep onto None (keep the value as-is) or a
+# nested spec, which is applied to a dict value or to each item of a list.
+FieldSpec = Mapping[str, Optional["FieldSpec"]]
+
+def project(data: Any, spec: FieldSpec) -> Any:
+    """
+    Returns a copy of `data` with only the fields named in `spec`.
+    Missing fields are left out rather than sent as null.
+    """
+    if isinstance(data, list):
+        return [project(item, spec) for item in data]
+    if not isinstance(data, dict):
+        return data
+
+    projected = {}
+    for key, nested in spec.items():
+        if key not in data:
+            continue
+        projected[key] = data[key] if nested is None else project(data[key], nested)
+    return projected
+
+
+def compact_json(data: Any) -> str:
+    """
+    Serializes `data` without indentation or spaces after separators.
+    """
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def lean_payload(
+    data: Any, spec: FieldSpec, metadata: Optional[Dict[str, Any]], key: str
+) -> str:
+    """
+    Returns the compact, projected JSON of `data` for a prompt, and records
+    the size in characters of the old full payload (indented, every field)
+    against the lean one in metadata[key]. These are character counts, not
+    tokens; Gemini's billed total is in the response's usage metadata.
+    """
+    payload = compact_json(project(data, spec))
+    if metadata is not None:
+        metadata[key] = {
+            "full_chars": len(json.dumps(data, indent=2)),
+            "lean_chars": len(payload),
+        }
+    return payload
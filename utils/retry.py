@@ -0,0 +1,149 @@
+import contextvars
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+import requests
+
+from utils.logger import get_logger
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: rate limited, or a transient server error.
+# google.api_core exceptions carry theirs as `.code`; requests errors on
+# `.response.status_code`.
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+@dataclass
+class RetryPolicy:
+    """
+    How an external call is retried and hedged.
+
+    `hedge_after_sec` of None disables hedging.
+    """
+
+    max_attempts: int = 3
+    base_delay_sec: float = 0.5
+    max_delay_sec: float = 8.0
+    hedge_after_sec: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, section: Dict[str, Any]) -> "RetryPolicy":
+        return cls(
+            max_attempts=max(1, section.get("max_attempts", cls.max_attempts)),
+            base_delay_sec=section.get("base_delay_sec", cls.base_delay_sec),
+            max_delay_sec=section.get("max_delay_sec", cls.max_delay_sec),
+            hedge_after_sec=section.get("hedge_after_sec"),
+        )
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code
+    return getattr(getattr(error, "response", None), "status_code", None)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    True for errors a second attempt can fix: network failures, timeouts,
+    rate limits and 5xx responses. Bad requests and parse errors are not.
+    """
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return isinstance(
+        error,
+        (ConnectionError, TimeoutError, requests.ConnectionError, requests.Timeout),
+    )
+
+
+def backoff_delay(attempt: int, policy: RetryPolicy) -> float:
+    """
+    The wait before retry number `attempt` (1-based): exponential, capped,
+    with full jitter so clients that failed together do not retry together.
+    """
+    ceiling = min(policy.max_delay_sec, policy.base_delay_sec * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    policy: RetryPolicy,
+    on_retry: Optional[Callable[[int, BaseException, float], None]] = None,
+    retryable: Callable[[BaseException], bool] = is_retryable,
+) -> T:
+    """
+    Calls `fn` until it succeeds, it raises a non-retryable error, or
+    `policy.max_attempts` attempts have failed. `on_retry(attempt, error,
+    delay)` is called before each retry.
+    """
+    attempt = 1
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= policy.max_attempts or not retryable(e):
+                raise
+            delay = backoff_delay(attempt, policy)
+            if on_retry is not None:
+                on_retry(attempt, e, delay)
+            time.sleep(delay)
+            attempt += 1
+
+
+def hedged_call(
+    fn: Callable[[], T], hedge_after_sec: float, executor: ThreadPoolExecutor
+) -> Tuple[T, bool, bool]:
+    """
+    Calls `fn`, and if it has not answered within `hedge_after_sec`, calls
+    it a second time and keeps whichever succeeds first. If one fails, the
+    other is still awaited. The slower call is left to finish on its own.
+
+    Returns (result, hedge_sent, hedge_won). Both calls run in `executor`,
+    in copies of the caller's context variables.
+    """
+
+    def submit() -> Future:
+        return executor.submit(contextvars.copy_context().run, fn)
+
+    primary = submit()
+    done, _ = wait([primary], timeout=hedge_after_sec)
+    if done:
+        return primary.result(), False, False
+
+    hedge = submit()
+    pending = {primary, hedge}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result(), True, future is hedge
+            error = error or future.exception()
+    raise error
+
+
+# --- Process-wide Hedge Executor ---
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+
+def get_hedge_executor(max_workers: int = 32) -> ThreadPoolExecutor:
+    """
+    Returns the shared executor that hedged calls run on.
+    """
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="hedge"
+            )
+        return _hedge_executor
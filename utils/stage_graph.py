@@ -0,0 +1,228 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from state.story_state import StoryState
+from utils.logger import get_logger, log_context
+from utils.metrics import STAGE_DURATION, STAGE_ERRORS, STAGES_IN_FLIGHT
+from utils.profiling import profiled
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+# Called as on_event(event_name, data) whenever a pipeline stage finishes.
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+
+class PipelineError(Exception):
+    """
+    Raised when a run fails. Carries the run ID needed to resume it.
+    """
+
+    def __init__(self, run_id: str, detail: str):
+        super().__init__(f"{detail} (run_id={run_id})")
+        self.run_id = run_id
+        self.detail = detail
+
+
+class RunConflictError(Exception):
+    """
+    Raised instead of starting a run that is already executing, or resuming
+    one that already succeeded.
+    """
+
+
+# --- Active Runs ---
+# Run IDs executing in this process. Two executions of one run would write
+# the same checkpoint, package and images.
+_active_runs: Set[str] = set()
+_active_runs_lock = threading.Lock()
+
+
+@contextmanager
+def claim_run(run_id: str) -> Iterator[None]:
+    """
+    Marks `run_id` as executing for the enclosed block. Raises
+    RunConflictError if it already is.
+    """
+    with _active_runs_lock:
+        if run_id in _active_runs:
+            raise RunConflictError(f"Run {run_id} is already running")
+        _active_runs.add(run_id)
+    try:
+        yield
+    finally:
+        with _active_runs_lock:
+            _active_runs.discard(run_id)
+
+
+def is_run_active(run_id: str) -> bool:
+    with _active_runs_lock:
+        return run_id in _active_runs
+
+
+def package_or_raise(final_state: StoryState) -> dict:
+    """
+    Returns the final package, or raises PipelineError with the run ID so
+    the caller can resume the run.
+    """
+    if "pipeline_error" in final_state.metadata:
+        raise PipelineError(final_state.run_id, final_state.metadata["pipeline_error"])
+    return final_state.final_package
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step, described by the StoryState fields it reads and writes.
+    """
+
+    name: str
+    run: Callable[[StoryState], StoryState]
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    # The metadata key the agent sets when it fails
+    error_key: str
+    # A non-fatal stage's failure is kept in metadata as a warning, and the
+    # run still completes
+    fatal: bool = True
+
+
+class StageGraph:
+    """
+    Runs stages as a dependency graph over StoryState fields.
+
+    A stage depends on every stage that produces one of its inputs. Each stage
+    starts as soon as its dependencies finish, so independent branches run
+    concurrently and wall-clock time follows the critical path.
+    """
+
+    def __init__(self, stages: List[Stage], initial_inputs: Iterable[str] = ("idea",)):
+        self.stages: Dict[str, Stage] = {stage.name: stage for stage in stages}
+        self.dependencies = self._resolve_dependencies(stages, set(initial_inputs))
+
+    def run(
+        self,
+        state: StoryState,
+        on_stage_complete: Optional[Callable[[Stage], None]] = None,
+        completed_stages: Iterable[str] = (),
+    ) -> StoryState:
+        """
+        Runs every stage, raising as soon as a fatal one fails. Each finished
+        stage's wall-clock time is added to metadata["stage_timings_sec"].
+
+        Stages already running when a failure is seen are allowed to finish;
+        no new stages are started after it. Stages in `completed_stages`
+        (e.g. from a checkpoint) are skipped. Errors the remaining stages
+        recorded in an earlier attempt are cleared before they run again.
+        """
+        completed: Set[str] = set(completed_stages) & set(self.stages)
+        pending = set(self.stages) - completed
+        failure: Optional[str] = None
+
+        for name in pending:
+            state.metadata.pop(self.stages[name].error_key, None)
+
+        with ThreadPoolExecutor(
+            max_workers=len(self.stages), thread_name_prefix="stage"
+        ) as executor:
+            running = {}
+
+            while pending or running:
+                if failure is None:
+                    for name in sorted(pending):
+                        if self.dependencies[name] <= completed:
+                            pending.remove(name)
+                            # Stages see the caller's context variables
+                            context = contextvars.copy_context()
+                            future = executor.submit(context.run, self._run_stage, name, state)
+                            running[future] = name
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = self.stages[running.pop(future)]
+                    duration = 0.0
+                    try:
+                        duration = future.result()
+                    except Exception as e:
+                        state.metadata.setdefault(stage.error_key, str(e))
+
+                    if stage.error_key in state.metadata:
+                        STAGE_ERRORS.inc(stage=stage.name)
+                        if stage.fatal:
+                            failure = failure or state.metadata[stage.error_key]
+                            continue
+                        logger.warning(
+                            f"Optional stage '{stage.name}' failed: "
+                            f"{state.metadata[stage.error_key]}"
+                        )
+
+                    state.metadata.setdefault("stage_timings_sec", {})[stage.name] = round(
+                        duration, 3
+                    )
+
+                    completed.add(stage.name)
+                    if on_stage_complete is not None:
+                        on_stage_complete(stage)
+
+        if failure is not None:
+            raise Exception(failure)
+
+        return state
+
+    def _run_stage(self, name: str, state: StoryState) -> float:
+        with log_context(stage=name):
+            logger.info(f"Running stage '{name}'...")
+            STAGES_IN_FLIGHT.inc(stage=name)
+            start = time.perf_counter()
+            try:
+                with profiled(f"stage:{name}"):
+                    self.stages[name].run(state)
+            finally:
+                duration = time.perf_counter() - start
+                STAGES_IN_FLIGHT.dec(stage=name)
+                STAGE_DURATION.observe(duration, stage=name)
+            logger.info(f"Stage '{name}' finished in {duration:.2f}s.")
+            return duration
+
+    @staticmethod
+    def _resolve_dependencies(
+        stages: List[Stage], initial_inputs: Set[str]
+    ) -> Dict[str, Set[str]]:
+        producers = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in producers:
+                    raise ValueError(
+                        f"'{output}' is produced by both '{producers[output]}' and '{stage.name}'"
+                    )
+                producers[output] = stage.name
+
+        dependencies = {}
+        for stage in stages:
+            deps = set()
+            for field_name in stage.inputs:
+                if field_name in producers:
+                    deps.add(producers[field_name])
+                elif field_name not in initial_inputs:
+                    raise ValueError(
+                        f"Stage '{stage.name}' needs '{field_name}', which no stage produces"
+                    )
+            dependencies[stage.name] = deps
+
+        # Reject cycles up front so run() can never stall
+        resolved: Set[str] = set()
+        while len(resolved) < len(stages):
+            ready = {n for n, d in dependencies.items() if n not in resolved and d <= resolved}
+            if not ready:
+                raise ValueError("Stage graph has a dependency cycle")
+            resolved |= ready
+
+        return dependencies
@@ -0,0 +1,227 @@
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+from xml.sax.saxutils import escape
+
+from utils.config import load_config
+from utils.logger import get_logger
+
+try:
+    from reportlab import rl_config
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.pdfgen.canvas import Canvas
+    from reportlab.platypus import Paragraph
+except ImportError:  # Optional: PDF export is disabled without it
+    Canvas = None
+
+# --- Config & Logging ---
+logger = get_logger(__name__)
+
+PDF_AVAILABLE = Canvas is not None
+
+if PDF_AVAILABLE:
+    # Embed frames as binary streams. The default ASCII85 text encoding is
+    # a quarter larger and, without reportlab's C accelerator, slow.
+    rl_config.useA85 = 0
+
+
+def storyboard_pages(
+    script: Optional[Dict[str, Any]],
+    scenes: Optional[List[Dict[str, Any]]],
+    storyboard_prompts: Optional[List[Dict[str, Any]]],
+    storyboard_images: Optional[List[str]],
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields one page per shot, in shot order: its image path (or None) and
+    the text printed beside it.
+
+    Shots carry the location of the script scene they were cut from, so a
+    script scene's dialogue and voiceover go on its first matching shot.
+    """
+    # storyboard_images lines up with storyboard_prompts, which has the scene IDs
+    images_by_scene = {
+        str(prompt.get("scene_id")): image_path
+        for prompt, image_path in zip(storyboard_prompts or [], storyboard_images or [])
+    }
+    script_scenes = list((script or {}).get("scenes") or [])
+    next_script_scene = 0
+
+    for shot in scenes or []:
+        lines: List[Dict[str, Any]] = []
+        voiceover = ""
+        for index in range(next_script_scene, len(script_scenes)):
+            if script_scenes[index].get("location") == shot.get("location"):
+                lines = script_scenes[index].get("dialogue") or []
+                voiceover = script_scenes[index].get("voiceover") or ""
+                next_script_scene = index + 1
+                break
+
+        image_path = images_by_scene.get(str(shot.get("scene_id")))
+        yield {
+            "scene_id": shot.get("scene_id"),
+            "camera_angle": shot.get("camera_angle", ""),
+            "location": shot.get("location", ""),
+            "shot_description": shot.get("shot_description", ""),
+            "key_action": shot.get("key_action", ""),
+            "dialogue": lines,
+            "voiceover": voiceover,
+            # Failed scenes are stored as ERROR_* placeholders, not paths
+            "image_path": image_path if image_path and os.path.isfile(image_path) else None,
+        }
+
+
+def write_storyboard_pdf(
+    pages: Iterator[Dict[str, Any]], output_path: str, title: str = "Storyboard"
+) -> str:
+    """
+    Draws one landscape page per shot: the frame on the left, the shot
+    description, camera angle and dialogue on the right.
+
+    Pages are drawn and finished one at a time from `pages`. Each frame is
+    read from disk by path as its page is drawn; reportlab copies a JPEG's
+    compressed bytes straight into the PDF, so frames are never decoded
+    and memory grows with the file size, not with decoded bitmaps.
+    """
+    page_width, page_height = landscape(A4)
+    margin = 36
+    frame_size = page_height - 2 * margin - 40
+    text_x = margin + frame_size + 24
+    text_width = page_width - text_x - margin
+
+    heading = ParagraphStyle("heading", fontName="Helvetica-Bold", fontSize=14, leading=18)
+    label = ParagraphStyle("label", fontName="Helvetica-Bold", fontSize=10, leading=13)
+    body = ParagraphStyle("body", fontName="Helvetica", fontSize=10, leading=13, spaceAfter=6)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    # Per-thread, since two requests may build the same run's PDF at once
+    tmp_path = f"{output_path}.{threading.get_ident()}.tmp"
+    canvas = Canvas(tmp_path, pagesize=(page_width, page_height))
+    canvas.setTitle(title)
+
+    page_count = 0
+    for page in pages:
+        page_count += 1
+        canvas.setFont("Helvetica-Bold", 12)
+        canvas.drawString(margin, page_height - margin - 12, title)
+        canvas.setFont("Helvetica", 9)
+        canvas.drawRightString(
+            page_width - margin, page_height - margin - 12, f"Shot {page['scene_id']}"
+        )
+
+        frame_y = margin
+        if page["image_path"]:
+            canvas.drawImage(
+                page["image_path"],
+                margin,
+                frame_y,
+                width=frame_size,
+                height=frame_size,
+                preserveAspectRatio=True,
+            )
+        else:
+            canvas.setStrokeColor(HexColor("#999999"))
+            canvas.rect(margin, frame_y, frame_size, frame_size)
+            canvas.drawCentredString(
+                margin + frame_size / 2, frame_y + frame_size / 2, "No image"
+            )
+
+        paragraphs = [
+            Paragraph(escape(f"{page['camera_angle']} - {page['location']}"), heading),
+            Paragraph("Shot", label),
+            Paragraph(escape(page["shot_description"]), body),
+            Paragraph("Key action", label),
+            Paragraph(escape(page["key_action"]), body),
+        ]
+        if page["dialogue"]:
+            paragraphs.append(Paragraph("Dialogue", label))
+            for line in page["dialogue"]:
+                paragraphs.append(
+                    Paragraph(
+                        f"<b>{escape(str(line.get('character', '')))}:</b> "
+                        f"{escape(str(line.get('line', '')))}",
+                        body,
+                    )
+                )
+        if page["voiceover"]:
+            paragraphs.append(Paragraph("Voiceover", label))
+            paragraphs.append(Paragraph(escape(page["voiceover"]), body))
+
+        y = frame_y + frame_size
+        for paragraph in paragraphs:
+            _, height = paragraph.wrap(text_width, y - margin)
+            if y - height < margin:
+                break
+            y -= height
+            paragraph.drawOn(canvas, text_x, y)
+            y -= paragraph.style.spaceAfter
+
+        canvas.showPage()
+
+    # Write then rename, so a reader never sees a partial file
+    try:
+        canvas.save()
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    logger.info(f"Storyboard PDF with {page_count} pages saved to {output_path}")
+    return output_path
+
+
+class StoryboardPdfExporter:
+    """
+    Writes storyboard PDFs to `<directory>/<run_id>/storyboard.pdf`, next to
+    the run's other storyboard assets.
+
+    At most `max_concurrent` PDFs are built at once; further exports wait
+    for a slot, so many simultaneous requests cannot add up their memory.
+    """
+
+    def __init__(self, directory: str, max_concurrent: int = 2):
+        self.directory = directory
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrent))
+
+    def path_for(self, run_id: str) -> str:
+        return os.path.join(self.directory, os.path.basename(run_id), "storyboard.pdf")
+
+    def export(
+        self,
+        run_id: str,
+        script: Optional[Dict[str, Any]],
+        scenes: Optional[List[Dict[str, Any]]],
+        storyboard_prompts: Optional[List[Dict[str, Any]]],
+        storyboard_images: Optional[List[str]],
+    ) -> str:
+        """
+        Builds the run's storyboard PDF and returns its path.
+        Raises RuntimeError if reportlab is not installed.
+        """
+        if not PDF_AVAILABLE:
+            raise RuntimeError("PDF export needs reportlab (pip install reportlab)")
+
+        title = (script or {}).get("title") or "Storyboard"
+        pages = storyboard_pages(script, scenes, storyboard_prompts, storyboard_images)
+        with self._slots:
+            return write_storyboard_pdf(pages, self.path_for(run_id), title)
+
+
+# --- Process-wide Exporter ---
+_exporter: Optional[StoryboardPdfExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def get_pdf_exporter() -> StoryboardPdfExporter:
+    """
+    Returns the shared exporter, writing under the configured "storyboards" path.
+    """
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            config = load_config()
+            _exporter = StoryboardPdfExporter(
+                directory=config.paths.get("storyboards", "outputs/storyboards"),
+                max_concurrent=config.get("export", {}).get("max_concurrent", 2),
+            )
+        return _exporter